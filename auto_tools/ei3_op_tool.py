@@ -30,6 +30,10 @@ else:
 
 app_name = 'Etu Insight'
 
+# Response cache TTLs (seconds) of the read-mostly resources, e.g. /app/{id}/role, /group/{id}/user, /bandcategory
+EMC2_CACHE_TTLS = {'app': 3600, 'permission': 3600, 'role': 3600, 'schema': 3600, 'version': 3600, 'user': 60}
+EI3_CACHE_TTLS = {'genecategory': 600, 'fixedgenecategory': 600, 'bandcategory': 60}
+
 logger = logging.getLogger('ei3_op_tool')
 logger.setLevel(logging.INFO)
 stream_handler = logging.StreamHandler(sys.stdout)
@@ -208,165 +212,156 @@ def add_new_bands(ei3, group, data_source):
     group_def_username = '{0}_DefaultOperator'.format(group['name'])
     ei3.do_su_login(group, group_def_username)
 
-    # Get all band categories of the simulated user
-    categories = ei3.get_band_categories()
-
-    # Add all new band categories with checking existed or not
-    new_band_categories = [
-        BandCategory(name=u'1.活躍客群統計'),
-        BandCategory(name=u'2.潛力消費名單'),
-        BandCategory(name=u'3.顧客價值分群'),
-        BandCategory(name=u'4.核心關注客群'),
-        BandCategory(name=u'客戶解析(7日)'),
-        BandCategory(name=u'客戶解析(30日)'),
-        BandCategory(name=u'客戶解析(90日)'),
-        BandCategory(name=u'客戶消費力'),
-    ]
-    for category in new_band_categories:
-        exist_category = filter(lambda x: x['name'] == category['name'], categories)
-        if len(exist_category) > 0:
-            logger.info('Category (%s) already exist. No need to add new.' % category['name'])
-        else:
-            logger.info('Adding category (%s)...' % category['name'])
-            category['isDefault'] = True
-            ei3.add_band_category(category)
-            logger.info('Done.')
-
-    # Re-query categories to get complete info
-    categories = ei3.get_band_categories()
-    cat_dict = {x['name']: x for x in categories}
-    bands = [bands for cat in categories for bands in cat['bands']]
-
-    gene_bands = [
-        # 客戶解析(7日)
-        Band(category=cat_dict[u'客戶解析(7日)'], name=u'7日內總訪客數', description='',type=BandType.GENE,
-             target_gene=BandGene('Login_7', data_source, BandGeneOperator.GE, '1'),
-             shared=True),
-        Band(category=cat_dict[u'客戶解析(7日)'], name=u'7日內曾消費客戶', description='',type=BandType.GENE,
-             target_gene=BandGene('Orders_7', data_source, BandGeneOperator.GE, '1'),
-             shared=True),
-        Band(category=cat_dict[u'客戶解析(7日)'], name=u'昨日曾消費', description='',type=BandType.GENE,
-             target_gene=BandGene('Orders_1', data_source, BandGeneOperator.GE, '1'),
-             shared=True),
-        # 客戶解析(30日)
-        Band(category=cat_dict[u'客戶解析(30日)'], name=u'30日內總訪客數', description='',type=BandType.GENE,
-             target_gene=BandGene('Login_30', data_source, BandGeneOperator.GE, '1'),
-             shared=True),
-        Band(category=cat_dict[u'客戶解析(30日)'], name=u'最近30天造訪3次以上', description='',type=BandType.GENE,
-             target_gene=BandGene('Session_30', data_source, BandGeneOperator.GE, '3'),
-             shared=True),
-        Band(category=cat_dict[u'客戶解析(30日)'], name=u'30日內曾消費客戶', description='',type=BandType.GENE,
-             target_gene=BandGene('Orders_30', data_source, BandGeneOperator.GE, '1'),
-             shared=True),
-        # 客戶解析(90日)
-        Band(category=cat_dict[u'客戶解析(90日)'], name=u'90日內總訪客數', description='',type=BandType.GENE,
-             target_gene=BandGene('Login_90', data_source, BandGeneOperator.GE, '1'),
-             shared=True),
-        Band(category=cat_dict[u'客戶解析(90日)'], name=u'最近90天造訪3次以上', description='',type=BandType.GENE,
-             target_gene=BandGene('Session_30', data_source, BandGeneOperator.GE, '3'),
-             shared=True),
-        Band(category=cat_dict[u'客戶解析(90日)'], name=u'90日內曾消費客戶', description='',type=BandType.GENE,
-             target_gene=BandGene('Orders_90', data_source, BandGeneOperator.GE, '1'),
-             shared=True),
-        # 客戶消費力
-        Band(category=cat_dict[u'客戶消費力'], name=u'消費力前20%', description='',type=BandType.GENE,
-             target_gene=BandGene('RevenueDist_30', data_source, BandGeneOperator.GE, '80'),
-             shared=True),
-        Band(category=cat_dict[u'客戶消費力'], name=u'訂單數大於等於平均', description='',type=BandType.GENE,
-             target_gene=BandGene('Orders_90', data_source, BandGeneOperator.GE, '2'),
-             shared=True),
-        Band(category=cat_dict[u'客戶消費力'], name=u'訂單數小於平均', description='',type=BandType.GENE,
-             target_gene=BandGene('Orders_90', data_source, BandGeneOperator.LT, '2'),
-             shared=True),
-        Band(category=cat_dict[u'客戶消費力'], name=u'消費金額大於等於平均', description='',type=BandType.GENE,
-             target_gene=BandGene('RevenueAvg_90', data_source, BandGeneOperator.GE, '250'),
-             shared=True),
-        Band(category=cat_dict[u'客戶消費力'], name=u'消費金額小於平均', description='',type=BandType.GENE,
-             target_gene=BandGene('RevenueAvg_90', data_source, BandGeneOperator.LT, '250'),
-             shared=True),
-        # 1.活躍客群統計
-        Band(category=cat_dict[u'1.活躍客群統計'], name=u'昨日訪客數', description='',type=BandType.GENE,
-             target_gene=BandGene('Login_7', data_source, BandGeneOperator.GE, '1'),
-             shared=True),
-        # 4.核心關注客群
-        Band(category=cat_dict[u'4.核心關注客群'], name=u'高度貢獻客群', description='',type=BandType.GENE,
-             target_gene=BandGene('RevenueDist_90', data_source, BandGeneOperator.GE, '95'),
-             shared=True),
-    ]
-    for band in gene_bands:
-        exist_band = filter(lambda x: x['categoryId'] == band['categoryId'] and x['name'] == band['name'], bands)
-        if len(exist_band) > 0:
-            logger.info('Band (%s) already exist. No need to add new.' % band['name'])
-        else:
-            logger.info('Adding band (%s)...' % band['name'])
-            band['isDefault'] = True
-            ei3.add_band(band)
-            logger.info('Done.')
+    # Get all band categories of the simulated user, kept up to date as bands are added below
+    band_index = ei3.get_band_index()
+    try:
+        # Add all new band categories with checking existed or not
+        new_band_categories = [
+            BandCategory(name=u'1.活躍客群統計'),
+            BandCategory(name=u'2.潛力消費名單'),
+            BandCategory(name=u'3.顧客價值分群'),
+            BandCategory(name=u'4.核心關注客群'),
+            BandCategory(name=u'客戶解析(7日)'),
+            BandCategory(name=u'客戶解析(30日)'),
+            BandCategory(name=u'客戶解析(90日)'),
+            BandCategory(name=u'客戶消費力'),
+        ]
+        for category in new_band_categories:
+            if band_index.find_band_category(category['name']) is not None:
+                logger.info('Category (%s) already exist. No need to add new.' % category['name'])
+            else:
+                logger.info('Adding category (%s)...' % category['name'])
+                category['isDefault'] = True
+                ei3.add_band_category(category)
+                logger.info('Done.')
 
-    # Re-query categories to get complete info
-    categories = ei3.get_band_categories()
-    cat_dict = {x['name']: x for x in categories}
-    bands = [bands for cat in categories for bands in cat['bands']]
-    band_id_dict = {x['name']: x['id'] for x in bands}
-
-    combine_bands = [
-        # 1.活躍客群統計
-        Band(category=cat_dict[u'1.活躍客群統計'], name=u'新沉睡戶客群', description='', type=BandType.COMBINE,
-             target_band=BandCombine([band_id_dict[u'7日內總訪客數'], band_id_dict[u'昨日訪客數']], [BandCombineOperator.EXCEPT]),
-             shared=True),
-        Band(category=cat_dict[u'1.活躍客群統計'], name=u'沉睡客群', description='', type=BandType.COMBINE,
-             target_band=BandCombine([band_id_dict[u'30日內總訪客數'], band_id_dict[u'7日內總訪客數']], [BandCombineOperator.EXCEPT]),
-             shared=True),
-        Band(category=cat_dict[u'1.活躍客群統計'], name=u'流失客群', description='', type=BandType.COMBINE,
-             target_band=BandCombine([band_id_dict[u'90日內總訪客數'], band_id_dict[u'30日內總訪客數']], [BandCombineOperator.EXCEPT]),
-             shared=True),
-        # 2.潛力消費名單
-        Band(category=cat_dict[u'2.潛力消費名單'], name=u'昨日無消費', description='', type=BandType.COMBINE,
-             target_band=BandCombine([band_id_dict[u'昨日訪客數'], band_id_dict[u'昨日曾消費']], [BandCombineOperator.EXCEPT]),
-             shared=True),
-        Band(category=cat_dict[u'2.潛力消費名單'], name=u'近7日無消費', description='', type=BandType.COMBINE,
-             target_band=BandCombine([band_id_dict[u'7日內總訪客數'], band_id_dict[u'7日內曾消費客戶']], [BandCombineOperator.EXCEPT]),
-             shared=True),
-        Band(category=cat_dict[u'2.潛力消費名單'], name=u'近30日無消費', description='', type=BandType.COMBINE,
-             target_band=BandCombine([band_id_dict[u'30日內總訪客數'], band_id_dict[u'30日內曾消費客戶']], [BandCombineOperator.EXCEPT]),
-             shared=True),
-        Band(category=cat_dict[u'2.潛力消費名單'], name=u'近90日無消費', description='', type=BandType.COMBINE,
-             target_band=BandCombine([band_id_dict[u'90日內總訪客數'], band_id_dict[u'90日內曾消費客戶']], [BandCombineOperator.EXCEPT]),
-             shared=True),
-        # 3.顧客價值分群
-        Band(category=cat_dict[u'3.顧客價值分群'], name=u'優質客群', description='', type=BandType.COMBINE,
-             target_band=BandCombine([band_id_dict[u'訂單數大於等於平均'], band_id_dict[u'消費金額大於等於平均']], [BandCombineOperator.INTERSECT]),
-             shared=True),
-        Band(category=cat_dict[u'3.顧客價值分群'], name=u'提升客單價客群', description='', type=BandType.COMBINE,
-             target_band=BandCombine([band_id_dict[u'訂單數大於等於平均'], band_id_dict[u'消費金額小於平均']], [BandCombineOperator.INTERSECT]),
-             shared=True),
-        Band(category=cat_dict[u'3.顧客價值分群'], name=u'提升消費頻次客群', description='', type=BandType.COMBINE,
-             target_band=BandCombine([band_id_dict[u'訂單數小於平均'], band_id_dict[u'消費金額大於等於平均']], [BandCombineOperator.INTERSECT]),
-             shared=True),
-        Band(category=cat_dict[u'3.顧客價值分群'], name=u'即將流失客群', description='', type=BandType.COMBINE,
-             target_band=BandCombine([band_id_dict[u'訂單數小於平均'], band_id_dict[u'消費金額小於平均']], [BandCombineOperator.INTERSECT]),
-             shared=True),
-        # 4.核心關注客群
-        Band(category=cat_dict[u'4.核心關注客群'], name=u'近期關注客群', description='', type=BandType.COMBINE,
-             target_band=BandCombine([band_id_dict[u'最近30天造訪3次以上'], band_id_dict[u'90日內曾消費客戶']], [BandCombineOperator.INTERSECT]),
-             shared=True),
-        Band(category=cat_dict[u'4.核心關注客群'], name=u'重要挽留客群', description='', type=BandType.COMBINE,
-             target_band=BandCombine([band_id_dict[u'消費力前20%'], band_id_dict[u'最近30天造訪3次以上']], [BandCombineOperator.EXCEPT]),
-             shared=True),
-        Band(category=cat_dict[u'4.核心關注客群'], name=u'重點發展客群', description='', type=BandType.COMBINE,
-             target_band=BandCombine([band_id_dict[u'消費力前20%'], band_id_dict[u'最近90天造訪3次以上']], [BandCombineOperator.INTERSECT]),
-             shared=True),
-    ]
-    for band in combine_bands:
-        exist_band = filter(lambda x: x['categoryId'] == band['categoryId'] and x['name'] == band['name'], bands)
-        if len(exist_band) > 0:
-            logger.info('Band (%s) already exist. No need to add new.' % band['name'])
-        else:
-            logger.info('Adding band (%s)...' % band['name'])
-            band['isDefault'] = True
-            ei3.add_band(band)
-            logger.info('Done.')
+        cat_dict = {x['name']: x for x in band_index.band_categories}
+
+        gene_bands = [
+            # 客戶解析(7日)
+            Band(category=cat_dict[u'客戶解析(7日)'], name=u'7日內總訪客數', description='',type=BandType.GENE,
+                 target_gene=BandGene('Login_7', data_source, BandGeneOperator.GE, '1'),
+                 shared=True),
+            Band(category=cat_dict[u'客戶解析(7日)'], name=u'7日內曾消費客戶', description='',type=BandType.GENE,
+                 target_gene=BandGene('Orders_7', data_source, BandGeneOperator.GE, '1'),
+                 shared=True),
+            Band(category=cat_dict[u'客戶解析(7日)'], name=u'昨日曾消費', description='',type=BandType.GENE,
+                 target_gene=BandGene('Orders_1', data_source, BandGeneOperator.GE, '1'),
+                 shared=True),
+            # 客戶解析(30日)
+            Band(category=cat_dict[u'客戶解析(30日)'], name=u'30日內總訪客數', description='',type=BandType.GENE,
+                 target_gene=BandGene('Login_30', data_source, BandGeneOperator.GE, '1'),
+                 shared=True),
+            Band(category=cat_dict[u'客戶解析(30日)'], name=u'最近30天造訪3次以上', description='',type=BandType.GENE,
+                 target_gene=BandGene('Session_30', data_source, BandGeneOperator.GE, '3'),
+                 shared=True),
+            Band(category=cat_dict[u'客戶解析(30日)'], name=u'30日內曾消費客戶', description='',type=BandType.GENE,
+                 target_gene=BandGene('Orders_30', data_source, BandGeneOperator.GE, '1'),
+                 shared=True),
+            # 客戶解析(90日)
+            Band(category=cat_dict[u'客戶解析(90日)'], name=u'90日內總訪客數', description='',type=BandType.GENE,
+                 target_gene=BandGene('Login_90', data_source, BandGeneOperator.GE, '1'),
+                 shared=True),
+            Band(category=cat_dict[u'客戶解析(90日)'], name=u'最近90天造訪3次以上', description='',type=BandType.GENE,
+                 target_gene=BandGene('Session_30', data_source, BandGeneOperator.GE, '3'),
+                 shared=True),
+            Band(category=cat_dict[u'客戶解析(90日)'], name=u'90日內曾消費客戶', description='',type=BandType.GENE,
+                 target_gene=BandGene('Orders_90', data_source, BandGeneOperator.GE, '1'),
+                 shared=True),
+            # 客戶消費力
+            Band(category=cat_dict[u'客戶消費力'], name=u'消費力前20%', description='',type=BandType.GENE,
+                 target_gene=BandGene('RevenueDist_30', data_source, BandGeneOperator.GE, '80'),
+                 shared=True),
+            Band(category=cat_dict[u'客戶消費力'], name=u'訂單數大於等於平均', description='',type=BandType.GENE,
+                 target_gene=BandGene('Orders_90', data_source, BandGeneOperator.GE, '2'),
+                 shared=True),
+            Band(category=cat_dict[u'客戶消費力'], name=u'訂單數小於平均', description='',type=BandType.GENE,
+                 target_gene=BandGene('Orders_90', data_source, BandGeneOperator.LT, '2'),
+                 shared=True),
+            Band(category=cat_dict[u'客戶消費力'], name=u'消費金額大於等於平均', description='',type=BandType.GENE,
+                 target_gene=BandGene('RevenueAvg_90', data_source, BandGeneOperator.GE, '250'),
+                 shared=True),
+            Band(category=cat_dict[u'客戶消費力'], name=u'消費金額小於平均', description='',type=BandType.GENE,
+                 target_gene=BandGene('RevenueAvg_90', data_source, BandGeneOperator.LT, '250'),
+                 shared=True),
+            # 1.活躍客群統計
+            Band(category=cat_dict[u'1.活躍客群統計'], name=u'昨日訪客數', description='',type=BandType.GENE,
+                 target_gene=BandGene('Login_7', data_source, BandGeneOperator.GE, '1'),
+                 shared=True),
+            # 4.核心關注客群
+            Band(category=cat_dict[u'4.核心關注客群'], name=u'高度貢獻客群', description='',type=BandType.GENE,
+                 target_gene=BandGene('RevenueDist_90', data_source, BandGeneOperator.GE, '95'),
+                 shared=True),
+        ]
+        for band in gene_bands:
+            if band_index.find_bands(band['name'], band['categoryId']):
+                logger.info('Band (%s) already exist. No need to add new.' % band['name'])
+            else:
+                logger.info('Adding band (%s)...' % band['name'])
+                band['isDefault'] = True
+                ei3.add_band(band)
+                logger.info('Done.')
 
+        band_id_dict = {x['name']: x['id'] for x in band_index.bands}
+
+        combine_bands = [
+            # 1.活躍客群統計
+            Band(category=cat_dict[u'1.活躍客群統計'], name=u'新沉睡戶客群', description='', type=BandType.COMBINE,
+                 target_band=BandCombine([band_id_dict[u'7日內總訪客數'], band_id_dict[u'昨日訪客數']], [BandCombineOperator.EXCEPT]),
+                 shared=True),
+            Band(category=cat_dict[u'1.活躍客群統計'], name=u'沉睡客群', description='', type=BandType.COMBINE,
+                 target_band=BandCombine([band_id_dict[u'30日內總訪客數'], band_id_dict[u'7日內總訪客數']], [BandCombineOperator.EXCEPT]),
+                 shared=True),
+            Band(category=cat_dict[u'1.活躍客群統計'], name=u'流失客群', description='', type=BandType.COMBINE,
+                 target_band=BandCombine([band_id_dict[u'90日內總訪客數'], band_id_dict[u'30日內總訪客數']], [BandCombineOperator.EXCEPT]),
+                 shared=True),
+            # 2.潛力消費名單
+            Band(category=cat_dict[u'2.潛力消費名單'], name=u'昨日無消費', description='', type=BandType.COMBINE,
+                 target_band=BandCombine([band_id_dict[u'昨日訪客數'], band_id_dict[u'昨日曾消費']], [BandCombineOperator.EXCEPT]),
+                 shared=True),
+            Band(category=cat_dict[u'2.潛力消費名單'], name=u'近7日無消費', description='', type=BandType.COMBINE,
+                 target_band=BandCombine([band_id_dict[u'7日內總訪客數'], band_id_dict[u'7日內曾消費客戶']], [BandCombineOperator.EXCEPT]),
+                 shared=True),
+            Band(category=cat_dict[u'2.潛力消費名單'], name=u'近30日無消費', description='', type=BandType.COMBINE,
+                 target_band=BandCombine([band_id_dict[u'30日內總訪客數'], band_id_dict[u'30日內曾消費客戶']], [BandCombineOperator.EXCEPT]),
+                 shared=True),
+            Band(category=cat_dict[u'2.潛力消費名單'], name=u'近90日無消費', description='', type=BandType.COMBINE,
+                 target_band=BandCombine([band_id_dict[u'90日內總訪客數'], band_id_dict[u'90日內曾消費客戶']], [BandCombineOperator.EXCEPT]),
+                 shared=True),
+            # 3.顧客價值分群
+            Band(category=cat_dict[u'3.顧客價值分群'], name=u'優質客群', description='', type=BandType.COMBINE,
+                 target_band=BandCombine([band_id_dict[u'訂單數大於等於平均'], band_id_dict[u'消費金額大於等於平均']], [BandCombineOperator.INTERSECT]),
+                 shared=True),
+            Band(category=cat_dict[u'3.顧客價值分群'], name=u'提升客單價客群', description='', type=BandType.COMBINE,
+                 target_band=BandCombine([band_id_dict[u'訂單數大於等於平均'], band_id_dict[u'消費金額小於平均']], [BandCombineOperator.INTERSECT]),
+                 shared=True),
+            Band(category=cat_dict[u'3.顧客價值分群'], name=u'提升消費頻次客群', description='', type=BandType.COMBINE,
+                 target_band=BandCombine([band_id_dict[u'訂單數小於平均'], band_id_dict[u'消費金額大於等於平均']], [BandCombineOperator.INTERSECT]),
+                 shared=True),
+            Band(category=cat_dict[u'3.顧客價值分群'], name=u'即將流失客群', description='', type=BandType.COMBINE,
+                 target_band=BandCombine([band_id_dict[u'訂單數小於平均'], band_id_dict[u'消費金額小於平均']], [BandCombineOperator.INTERSECT]),
+                 shared=True),
+            # 4.核心關注客群
+            Band(category=cat_dict[u'4.核心關注客群'], name=u'近期關注客群', description='', type=BandType.COMBINE,
+                 target_band=BandCombine([band_id_dict[u'最近30天造訪3次以上'], band_id_dict[u'90日內曾消費客戶']], [BandCombineOperator.INTERSECT]),
+                 shared=True),
+            Band(category=cat_dict[u'4.核心關注客群'], name=u'重要挽留客群', description='', type=BandType.COMBINE,
+                 target_band=BandCombine([band_id_dict[u'消費力前20%'], band_id_dict[u'最近30天造訪3次以上']], [BandCombineOperator.EXCEPT]),
+                 shared=True),
+            Band(category=cat_dict[u'4.核心關注客群'], name=u'重點發展客群', description='', type=BandType.COMBINE,
+                 target_band=BandCombine([band_id_dict[u'消費力前20%'], band_id_dict[u'最近90天造訪3次以上']], [BandCombineOperator.INTERSECT]),
+                 shared=True),
+        ]
+        for band in combine_bands:
+            if band_index.find_bands(band['name'], band['categoryId']):
+                logger.info('Band (%s) already exist. No need to add new.' % band['name'])
+            else:
+                logger.info('Adding band (%s)...' % band['name'])
+                band['isDefault'] = True
+                ei3.add_band(band)
+                logger.info('Done.')
+    finally:
+        ei3.remove_band_listener(band_index)
     ei3.do_su_logout()
 
 
@@ -402,6 +397,19 @@ def get_exist_group(emc2):
     return group
 
 
+def del_bands(ei3, bands):
+    if not bands:
+        return
+
+    logger.info('Removing %d bands...' % len(bands))
+    results = ei3.del_bands(bands)
+    for result in results:
+        if not result.ok:
+            logger.error('Failed to remove band (%s).' % result.item['name'])
+            raise result.error
+    logger.info('Done.')
+
+
 def remove_bands(emc2, ei3, suspend_group):
 
     group_def_user = User('{0}_DefaultOperator'.format(suspend_group['name']), 'Default')
@@ -415,27 +423,19 @@ def remove_bands(emc2, ei3, suspend_group):
         # Do su login first to get per-user bandcats/bands
         ei3.do_su_login(suspend_group, user)
 
-        band_cats = ei3.get_band_categories()
-        # Remove combined bands from all categories first
-        for band_cat in band_cats:
-            for band in filter(lambda b: b['type'] == BandType.COMBINE, band_cat['bands']):
-                logger.info('Removing band (%s) from band category (%s)...' % (band['name'], band_cat['name']))
-                ei3.del_band(band)
-                logger.info('Done.')
-
-        band_cats = ei3.get_band_categories()
-        # Remove all other bands and categories
-        for band_cat in band_cats:
-            # Remove combined bands first
-            for band in band_cat['bands']:
-                logger.info('Removing band (%s) from band category (%s)...' % (band['name'], band_cat['name']))
-                ei3.del_band(band)
+        band_index = ei3.get_band_index()
+        try:
+            # Remove combined bands from all categories first
+            del_bands(ei3, [band for band in band_index.bands if band['type'] == BandType.COMBINE])
+
+            # Remove all other bands and categories (the deleted ones are gone from the index already)
+            del_bands(ei3, band_index.bands)
+            for band_cat in band_index.band_categories:
+                logger.info('Removing band category (%s)...' % band_cat['name'])
+                ei3.del_band_category(band_cat)
                 logger.info('Done.')
-
-            logger.info('Removing band category (%s)...' % band_cat['name'])
-            ei3.del_band_category(band_cat)
-            logger.info('Done.')
-
+        finally:
+            ei3.remove_band_listener(band_index)
         ei3.do_su_logout()
 
 
@@ -608,8 +608,11 @@ def main():
     cas = CAS(auth_info.group, auth_info.user, auth_info.password, auth_info.cas_host, secure=auth_info.security_check)
     emc2 = EMC2(cas, auth_info.emc2_host)
     emc2.logger.setLevel(LOGGING_LEVEL)
+    # Cache only the read-mostly resources. Other GETs (e.g. the EI sync) always reach the server.
+    emc2.enable_cache(default_ttl=None, ttls=EMC2_CACHE_TTLS)
     ei3 = EI3(cas, auth_info.ei3_host)
     ei3.logger.setLevel(LOGGING_LEVEL)
+    ei3.enable_cache(default_ttl=None, ttls=EI3_CACHE_TTLS)
 
     try:
         cas.login()
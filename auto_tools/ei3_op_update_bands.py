@@ -6,6 +6,7 @@ import logging
 import argparse
 
 from etunexus.cas import *
+from etunexus.ticketcache import *
 from etunexus.emc import *
 from etunexus.ei import *
 from etunexus.enum import *
@@ -97,22 +98,23 @@ def find_default_data_source(emc2, group):
     return def_ds[0]
 
 
-def _filter_bands(all_bands, band_names, find_all):
-    flatted_bands = [band for band_category in all_bands for band in band_category['bands']]
-    filtered_bands = filter(lambda band: band['name'] in band_names, flatted_bands)
+def _filter_bands(band_index, band_names, find_all):
+    # Each band once, even if its name is given more than once
+    band_names = sorted(set(band_names), key=band_names.index)
+    filtered_bands = [band for name in band_names for band in band_index.find_bands(name)]
     if find_all and len(filtered_bands) <> len(band_names):
         raise NotFoundError('...Not all bands (%s) found in the group op. Skip it.' % str(band_names))
     return filtered_bands
 
 
 def find_default_bands(ei3, data_source, band_names, find_all=True):
-    def_band_categories = ei3.get_default_bandcategories(data_source)
-    return _filter_bands(def_band_categories, band_names, find_all)
+    def_band_index = EI3BandIndex(ei3.get_default_bandcategories(data_source))
+    return _filter_bands(def_band_index, band_names, find_all)
 
 
 def find_op_bands(ei3, band_names, find_all=True):
-    op_bands = ei3.get_band_categories()
-    return _filter_bands(op_bands, band_names, find_all)
+    op_band_index = EI3BandIndex(ei3.get_band_categories(lazy=True))
+    return _filter_bands(op_band_index, band_names, find_all)
 
 
 def parse_args():
@@ -131,7 +133,8 @@ def main():
     auth_info = AuthInfo(args.group, args.user, args.password)
 
     logger.info('Validating login info...')
-    cas = CAS(auth_info.group, auth_info.user, auth_info.password, auth_info.cas_host, secure=auth_info.security_check)
+    cas = CAS(auth_info.group, auth_info.user, auth_info.password, auth_info.cas_host, secure=auth_info.security_check,
+              ticket_cache=TicketCache())
     emc2 = EMC2(cas, auth_info.emc2_host)
     emc2.logger.setLevel(LOGGING_LEVEL)
     ei3 = EI3(cas, auth_info.ei3_host)
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+""" Compare the memory of the dict based models and the compact records of users and audit log events.
+
+Each measurement builds N objects from json.loads output in a fresh process, and reports the RSS growth per object
+(including the decoded field strings), as ru_maxrss is a peak of the whole process.
+
+Usage (from the repo root):
+    PYTHONPATH=module python benchmarks/bench_compact_records.py [--count 1000000]
+"""
+
+import gc
+import os
+import sys
+import json
+import resource
+import argparse
+import subprocess
+
+from etunexus.emc import User, CompactUser, AuditLogEvent, CompactAuditLogEvent
+
+
+KINDS = [
+    ('AuditLogEvent', AuditLogEvent),
+    ('CompactAuditLogEvent', CompactAuditLogEvent),
+    ('User', User),
+    ('CompactUser', CompactUser)
+]
+
+
+def make_raw(kind, count):
+    if kind.endswith('User'):
+        return [json.dumps({
+            'id': i, 'name': 'u%d' % i, 'displayName': 'User %d' % i, 'department': 'd', 'mail': 'm',
+            'roles': [{'roleName': 'ADMIN', 'appId': 'EI'}], 'createTime': 1500000000000 + i,
+            'lastUpdateTime': 1500000000000 + i
+        }) for i in xrange(count)]
+    return [json.dumps({
+        'eventTime': 1500000000000 + i, 'userId': i % 100 + 1, 'groupUser': 'g/u', 'msg': '[Method]m;[Arguments]%d;' % i
+    }) for i in xrange(count)]
+
+
+def max_rss():
+    # KB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def measure(kind, count):
+    cls = dict(KINDS)[kind]
+    raw = make_raw(kind, count)
+    gc.collect()
+    before = max_rss()
+    objs = [cls.from_dict(json.loads(x)) for x in raw]
+    gc.collect()
+    assert len(objs) == count
+    return (max_rss() - before) * 1024.0 / count
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--count', type=int, default=1000000, help='Objects to build per measurement.')
+    parser.add_argument('--kind', choices=[x[0] for x in KINDS], help='Measure only one kind in this process.')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.kind:
+        print measure(args.kind, args.count)
+        return 0
+
+    results = {}
+    for kind, _ in KINDS:
+        output = subprocess.check_output([sys.executable, os.path.abspath(__file__), '--kind', kind,
+                                          '--count', str(args.count)])
+        results[kind] = float(output.strip())
+
+    print '%d objects per measurement, RSS growth per object:' % args.count
+    for model in ('AuditLogEvent', 'User'):
+        full, compact = results[model], results['Compact' + model]
+        print '  %-14s %6.0f B  ->  %-21s %6.0f B  (%+.0f%%)' % (model, full, 'Compact' + model, compact,
+                                                                 (compact - full) * 100 / full)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+""" Time the response decode cost of each installed JSON codec, per endpoint.
+
+The payloads are synthetic /bandcategory and /audit responses shaped like the real ones. Codecs not installed are
+skipped. It also shows which codec "auto" picks, to check it is the fastest one.
+
+Usage (from the repo root):
+    PYTHONPATH=module python benchmarks/bench_json_codec.py [--bands 1000] [--events 10000] [--repeat 5]
+"""
+
+import sys
+import time
+import json
+import argparse
+
+from etunexus import codec
+
+
+def make_band_categories(categories, bands_per_category):
+    data = []
+    for c in range(categories):
+        bands = []
+        for i in range(bands_per_category):
+            band_id = c * bands_per_category + i + 1
+            bands.append({
+                'id': band_id, 'categoryId': c + 1, 'name': u'Band %d 樂團' % band_id, 'description': 'Band description',
+                'needRefresh': False, 'type': 'gene', 'shared': False, 'amount': 12345, 'owner': 'user',
+                'updateTime': 1500000000000 + band_id,
+                'targetGene': {'geneId': 'gene%d' % i, 'cid': 3, 'operator': 'eq', 'operand': 'v'} if i % 2 else None,
+                'targetBand': {'bandIds': [band_id - 1, band_id - 2], 'operators': ['AND']} if not i % 2 else None,
+                'snapshotInfo': {'parent': None, 'children': [band_id]} if i % 3 else None
+            })
+        data.append({'id': c + 1, 'name': 'Category %d' % (c + 1), 'bands': bands})
+    return json.dumps({'data': data})
+
+
+def make_audit_logs(events):
+    return json.dumps({'startTime': 1500000000000, 'endTime': 1500003600000, 'events': [{
+        'eventTime': 1500000000000 + i * 100, 'userId': i % 50 + 1, 'groupUser': 'group/user%d' % (i % 50),
+        'msg': u'[Method]addBand;[Arguments]{"name": "Band %d 樂團", "categoryId": %d};' % (i, i % 20)
+    } for i in range(events)]})
+
+
+def best_time(func, arg, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.time()
+        func(arg)
+        elapsed = time.time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--categories', type=int, default=50, help='Band categories in the /bandcategory payload.')
+    parser.add_argument('--bands', type=int, default=1000, help='Bands per category in the /bandcategory payload.')
+    parser.add_argument('--events', type=int, default=100000, help='Events in the /audit payload.')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per measurement. The best one is reported.')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    payloads = [
+        ('/bandcategory', make_band_categories(args.categories, args.bands)),
+        ('/audit', make_audit_logs(args.events))
+    ]
+    names = []
+    for name in ('ujson', 'simplejson', 'json'):
+        try:
+            codec.get_codec(name)
+            names.append(name)
+        except ImportError:
+            print 'Skip codec %s: not installed' % name
+    print 'Codec picked by "auto": %s' % codec.get_codec('auto').name
+    print
+
+    print '%-16s %10s %12s %12s %10s' % ('endpoint', 'bytes', 'codec', 'loads (ms)', 'MB/s')
+    for endpoint, payload in payloads:
+        timings = []
+        for name in names:
+            elapsed = best_time(codec.get_codec(name).loads, payload, args.repeat)
+            timings.append((elapsed, name))
+            print '%-16s %10d %12s %12.1f %10.1f' % (endpoint, len(payload), name, elapsed * 1000,
+                                                     len(payload) / elapsed / 1e6)
+        print '%-16s fastest: %s' % (endpoint, min(timings)[1])
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,480 @@
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import json
+import time
+import errno
+import struct
+import bisect
+import hashlib
+from array import array
+
+from emc import EMC2, AuditLog, AuditLogEvent, parse_audit_msg
+from logger import get_logger
+
+
+class AuditLogTailer(object):
+    """ Fetch the new audit log events since the last poll, exactly once.
+
+    The tailer keeps a high-water mark in a local JSON file: the time up to which all events are handled, and the
+    hashes of the events handled at exactly that time (as a tie-breaker, since many events can share one millisecond,
+    if a poll stopped in the middle). Each poll asks the server only from the high-water mark on, drops what was
+    already handled, and moves the mark forward to the end of the polled range.
+    """
+
+    def __init__(self, emc2, state_path, start_time=None, delay=5000, window=3600000):
+        """ Constructor
+
+        Args:
+            emc2 (obj): The EMC2 instance to fetch audit logs.
+            state_path (str): The file to keep the high-water mark.
+            start_time (long): Where to start in Epoch (milliseconds) if there is no high-water mark yet. Default: now
+            delay (long): Milliseconds to stay behind the current time, for events written to the server late.
+            window (long): The initial window size of EMC2.iter_audit_logs() to catch up a long gap.
+        """
+        assert emc2 and isinstance(emc2, EMC2)
+        self._emc2 = emc2
+        assert state_path
+        self._state_path = state_path
+        assert delay >= 0
+        self._delay = delay
+        self._window = window
+        self._logger = get_logger()
+
+        self._time, self._seen = self._load()
+        if self._time is None:
+            self._time = start_time if start_time else self._now() - delay
+            self._seen = {}
+
+    @property
+    def state_path(self):
+        """ Get the high-water mark file path """
+        return self._state_path
+
+    @property
+    def high_water_mark(self):
+        """ Get the time from which the next poll fetches events """
+        return self._time
+
+    @staticmethod
+    def _now():
+        return long(time.time() * 1000)
+
+    @staticmethod
+    def event_hash(event):
+        """ Get the hash identifying an event among the ones at the same time """
+        return hashlib.sha1(json.dumps(event, sort_keys=True)).hexdigest()
+
+    def _load(self):
+        try:
+            with open(self._state_path, 'rb') as f:
+                state = json.load(f)
+        except IOError as e:
+            if e.errno != errno.ENOENT:
+                raise
+            return None, None
+        return long(state['eventTime']), dict(state['seen'])
+
+    def _save(self):
+        tmp_path = '%s.%d.tmp' % (self._state_path, os.getpid())
+        with open(tmp_path, 'wb') as f:
+            json.dump({'eventTime': self._time, 'seen': self._seen}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.rename(tmp_path, self._state_path)
+
+    def _advance(self, event, digest):
+        if event['eventTime'] > self._time:
+            self._time = event['eventTime']
+            self._seen = {}
+        self._seen[digest] = self._seen.get(digest, 0) + 1
+
+    def poll(self, handler=None):
+        """ Fetch the events after the high-water mark.
+
+        Without a handler, the new events are returned and the high-water mark is saved at once. With a handler, it
+        is called with each new event in time order, and the mark is saved after the last event handled, even if the
+        handler raises (the failed event is fetched again next time).
+
+        Arguments:
+            handler (callable): Called as handler(event) for each new AuditLogEvent.
+        Return:
+            A list of the new AuditLogEvent instances (the ones handled, if a handler is given).
+        """
+        end_time = self._now() - self._delay
+        if end_time <= self._time:
+            return []
+
+        seen = dict(self._seen)
+        events = []
+        for event in self._emc2.iter_audit_logs(self._time, end_time, window=self._window):
+            digest = self.event_hash(event)
+            if event['eventTime'] == self._time and seen.get(digest, 0) > 0:
+                # Handled in the last poll
+                seen[digest] -= 1
+                continue
+            events.append((event, digest))
+        events.sort(key=lambda x: x[0]['eventTime'])
+
+        handled = []
+        completed = False
+        try:
+            for event, digest in events:
+                if handler:
+                    handler(event)
+                self._advance(event, digest)
+                handled.append(event)
+            # Everything before end_time is handled. Skip the range next time, even if it had no events.
+            self._time, self._seen = end_time, {}
+            completed = True
+        finally:
+            if handled or completed:
+                self._save()
+        self._logger.debug('%d new audit log events, high-water mark at %d', len(handled), self._time)
+        return handled
+
+
+class AuditLogIndex(object):
+    """ In-memory index of audit log events by method, user and time bucket.
+
+    The events are sorted by eventTime, and each index keeps ascending event positions. A lookup such as "who called
+    del_band last week" takes the postings of the method and bisects them to the time range, without scanning or
+    parsing the other events.
+    """
+
+    def __init__(self, events, bucket_size=3600000):
+        """ Constructor
+
+        Args:
+            events (obj): An AuditLog instance, or an iterable of AuditLogEvent instances.
+            bucket_size (long): The time bucket size in milliseconds. Default: 1 hour
+        """
+        assert bucket_size > 0
+        self._bucket_size = bucket_size
+        if isinstance(events, AuditLog):
+            events = events['events']
+        self._events = sorted(events, key=lambda x: x['eventTime'])
+        self._times = [x['eventTime'] for x in self._events]
+        self._by_method = {}
+        self._by_user = {}
+        self._by_bucket = {}
+        for i, event in enumerate(self._events):
+            self._by_method.setdefault(event.method, array('l')).append(i)
+            self._by_user.setdefault(event['userId'], array('l')).append(i)
+            self._by_bucket.setdefault(event['eventTime'] // bucket_size, array('l')).append(i)
+
+    def __len__(self):
+        return len(self._events)
+
+    @property
+    def bucket_size(self):
+        """ Get the time bucket size (milliseconds) """
+        return self._bucket_size
+
+    @property
+    def methods(self):
+        """ Get the distinct methods indexed """
+        return self._by_method.keys()
+
+    @property
+    def user_ids(self):
+        """ Get the distinct user ids indexed """
+        return self._by_user.keys()
+
+    def find(self, method=None, user_id=None, start_time=None, end_time=None):
+        """ Find the events matching all the conditions given.
+
+        Arguments:
+            method (str): The parsed method of msg.
+            user_id (int): The userId.
+            start_time (long): The start time in Epoch (milliseconds), inclusive.
+            end_time (long): The end time in Epoch (milliseconds), exclusive.
+        Return:
+            A list of AuditLogEvent instances in time order.
+        """
+        lo = bisect.bisect_left(self._times, start_time) if start_time is not None else 0
+        hi = bisect.bisect_left(self._times, end_time) if end_time is not None else len(self._times)
+        postings = []
+        if method is not None:
+            postings.append(self._by_method.get(method, []))
+        if user_id is not None:
+            postings.append(self._by_user.get(user_id, []))
+        if not postings:
+            return self._events[lo:hi]
+
+        # Walk the shortest postings in the time range, and check the other condition on the events directly
+        first = min(postings, key=len)
+        events = [self._events[i] for i in first[bisect.bisect_left(first, lo):bisect.bisect_left(first, hi)]]
+        if len(postings) > 1:
+            events = [x for x in events if x.method == method and x['userId'] == user_id]
+        return events
+
+    def bucket(self, time):
+        """ Get the events in the time bucket containing a time, in time order """
+        return [self._events[i] for i in self._by_bucket.get(time // self._bucket_size, [])]
+
+    def bucket_counts(self, method=None):
+        """ Count events per time bucket.
+
+        Arguments:
+            method (str): Count only the events of the method, if given.
+        Return:
+            dict: The bucket start time (milliseconds) to the event count.
+        """
+        if method is None:
+            return dict([(k * self._bucket_size, len(v)) for k, v in self._by_bucket.iteritems()])
+        counts = {}
+        for i in self._by_method.get(method, []):
+            key = self._times[i] // self._bucket_size * self._bucket_size
+            counts[key] = counts.get(key, 0) + 1
+        return counts
+
+
+class AuditLogRowGroup(object):
+    """ A block of audit log events in columns, as read from a columnar export file.
+
+    Columns are decoded on first access, so a query touching only some columns does not pay for the others.
+
+    Columns:
+        event_time (tuple): eventTime (long) of each event.
+        user_id (array): userId (int) of each event.
+        group_user_codes (array): Index of each event into group_users.
+        group_users (list): The distinct groupUser values.
+        method_codes (array): Index of each event into methods.
+        methods (list): The distinct parsed methods. None for a msg not exactly in "[Method]xxx;[Arguments]yyy;" format
+                        (e.g. without the trailing ";").
+        arguments (list): The parsed arguments of each event, or the raw msg if the method is None.
+    """
+
+    def __init__(self, size, meta, blobs):
+        self._size = size
+        self._meta = meta
+        self._blobs = blobs
+        self._cache = {}
+
+    def __len__(self):
+        return self._size
+
+    def _array(self, name, typecode):
+        if name not in self._cache:
+            values = array(typecode)
+            values.fromstring(self._blobs[name])
+            if sys.byteorder == 'big':
+                values.byteswap()
+            self._cache[name] = values
+        return self._cache[name]
+
+    @property
+    def event_time(self):
+        """ Get the eventTime column """
+        if 'eventTime' not in self._cache:
+            self._cache['eventTime'] = struct.unpack('<%dq' % self._size, self._blobs['eventTime'])
+        return self._cache['eventTime']
+
+    @property
+    def user_id(self):
+        """ Get the userId column """
+        return self._array('userId', 'i')
+
+    @property
+    def group_user_codes(self):
+        """ Get the groupUser code column """
+        return self._array('groupUser', 'I')
+
+    @property
+    def group_users(self):
+        """ Get the groupUser dictionary """
+        return self._meta['groupUsers']
+
+    @property
+    def method_codes(self):
+        """ Get the method code column """
+        return self._array('method', 'I')
+
+    @property
+    def methods(self):
+        """ Get the method dictionary """
+        return self._meta['methods']
+
+    @property
+    def arguments(self):
+        """ Get the arguments column """
+        if 'arguments' not in self._cache:
+            offsets = self._array('argumentsOffset', 'I')
+            blob = self._blobs['arguments']
+            self._cache['arguments'] = [blob[offsets[i]:offsets[i + 1]].decode('utf-8') for i in xrange(self._size)]
+        return self._cache['arguments']
+
+    def iter_events(self):
+        """ Rebuild the AuditLogEvent instances of the row group. """
+        event_time, user_id = self.event_time, self.user_id
+        group_user_codes, group_users = self.group_user_codes, self.group_users
+        method_codes, methods, arguments = self.method_codes, self.methods, self.arguments
+        for i in xrange(self._size):
+            method = methods[method_codes[i]]
+            msg = arguments[i] if method is None else u'[Method]%s;[Arguments]%s;' % (method, arguments[i])
+            yield AuditLogEvent(event_time[i], user_id[i], group_users[group_user_codes[i]], msg)
+
+
+class AuditLogColumnWriter(object):
+    """ Write audit log events to a compact columnar file.
+
+    Events are buffered and written in row groups of "row_group_size" events. In each row group, eventTime is stored
+    as little-endian int64, userId as int32, groupUser and the parsed method are dictionary-encoded as uint32 codes,
+    and the parsed arguments as one UTF-8 blob with uint32 offsets. Read it back with AuditLogColumnReader.
+    """
+
+    magic = 'EAL1'
+    columns = ['eventTime', 'userId', 'groupUser', 'method', 'argumentsOffset', 'arguments']
+
+    def __init__(self, path, row_group_size=65536):
+        """ Constructor
+
+        Args:
+            path (str): The file path to write.
+            row_group_size (int): Events per row group. A row group is the unit held in memory on write and read.
+        """
+        assert row_group_size > 0
+        self._row_group_size = row_group_size
+        self._file = open(path, 'wb')
+        self._file.write(self.magic)
+        self._rows = []
+        self._count = 0
+
+    @property
+    def count(self):
+        """ Get the number of events written """
+        return self._count
+
+    def write(self, event):
+        """ Write an AuditLogEvent (or a dict with the same fields). """
+        self._rows.append(event)
+        self._count += 1
+        if len(self._rows) >= self._row_group_size:
+            self._flush()
+
+    def write_all(self, events):
+        """ Write all AuditLogEvent instances of an iterable. """
+        for event in events:
+            self.write(event)
+
+    @staticmethod
+    def _encode(codes, dictionary, value):
+        code = dictionary.get(value)
+        if code is None:
+            code = dictionary[value] = len(dictionary)
+        codes.append(code)
+
+    @staticmethod
+    def _dump(values):
+        if sys.byteorder == 'big':
+            values = array(values.typecode, values)
+            values.byteswap()
+        return values.tostring()
+
+    def _flush(self):
+        if not self._rows:
+            return
+        rows, self._rows = self._rows, []
+        group_users, methods = {}, {}
+        user_id, group_user_codes, method_codes = array('i'), array('I'), array('I')
+        offsets, arguments = array('I', [0]), []
+        size = 0
+        for event in rows:
+            user_id.append(event['userId'])
+            self._encode(group_user_codes, group_users, event['groupUser'])
+            msg = event['msg']
+            method, args = parse_audit_msg(msg)
+            if method is not None and not msg.endswith(';'):
+                # Only split a msg rebuilt exactly by AuditLogRowGroup.iter_events(). Keep the others verbatim.
+                method = None
+            self._encode(method_codes, methods, method)
+            args = (msg if method is None else args)
+            args = args.encode('utf-8') if isinstance(args, unicode) else args
+            arguments.append(args)
+            size += len(args)
+            offsets.append(size)
+
+        blobs = {
+            'eventTime': struct.pack('<%dq' % len(rows), *[x['eventTime'] for x in rows]),
+            'userId': self._dump(user_id),
+            'groupUser': self._dump(group_user_codes),
+            'method': self._dump(method_codes),
+            'argumentsOffset': self._dump(offsets),
+            'arguments': ''.join(arguments)
+        }
+        meta = json.dumps({
+            'groupUsers': sorted(group_users, key=group_users.get),
+            'methods': sorted(methods, key=methods.get),
+            'lengths': [len(blobs[x]) for x in self.columns]
+        })
+        self._file.write(struct.pack('<II', len(rows), len(meta)))
+        self._file.write(meta)
+        for name in self.columns:
+            self._file.write(blobs[name])
+
+    def close(self):
+        """ Write the buffered events and close the file. """
+        if self._file:
+            self._flush()
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+
+
+class AuditLogColumnReader(object):
+    """ Read a columnar audit log file written by AuditLogColumnWriter, one row group at a time. """
+
+    def __init__(self, path):
+        """ Constructor
+
+        Args:
+            path (str): The file path to read.
+        """
+        self._path = path
+
+    def __iter__(self):
+        """ Iterate the AuditLogRowGroup instances of the file """
+        with open(self._path, 'rb') as f:
+            if f.read(len(AuditLogColumnWriter.magic)) != AuditLogColumnWriter.magic:
+                raise ValueError('%s is not an audit log column file' % self._path)
+            while True:
+                header = f.read(8)
+                if not header:
+                    return
+                size, meta_length = struct.unpack('<II', header)
+                meta = json.loads(f.read(meta_length))
+                blobs = dict([(name, f.read(length))
+                              for name, length in zip(AuditLogColumnWriter.columns, meta['lengths'])])
+                yield AuditLogRowGroup(size, meta, blobs)
+
+    def iter_events(self):
+        """ Iterate all AuditLogEvent instances of the file """
+        for row_group in self:
+            for event in row_group.iter_events():
+                yield event
+
+
+def export_audit_logs(emc2, path, start_time, end_time, row_group_size=65536, **kwargs):
+    """ Export the audit log events in a time range to a columnar file, streaming window by window.
+
+    Arguments:
+        emc2 (obj): The EMC2 instance to fetch audit logs.
+        path (str): The file path to write.
+        start_time (long): The start time in Epoch (milliseconds), inclusive.
+        end_time (long): The end time in Epoch (milliseconds), exclusive.
+        row_group_size (int): Events per row group.
+        kwargs: Other arguments of EMC2.iter_audit_logs(), e.g. window, max_in_flight.
+    Return:
+        The number of events exported.
+    """
+    with AuditLogColumnWriter(path, row_group_size) as writer:
+        writer.write_all(emc2.iter_audit_logs(start_time, end_time, **kwargs))
+        return writer.count
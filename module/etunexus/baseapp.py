@@ -3,22 +3,51 @@
 import os
 import urllib
 import urllib2
-import json
+import time
+import socket
 import codecs
+import hashlib
+import httplib
 import logging
+import threading
 import traceback
+import functools
 
 from cas import CAS
+from executor import Executor, BatchResult
+from multipart import MultipartEncoder
+from compression import gzip_spool
+from codec import JSONCodec, get_codec, get_default_codec
+from jsonstream import iter_json_array
+from cache import ResponseCache
+from model import LazyModel
 from logger import get_logger
 
 
+class _TicketExpired(Exception):
+    """ The service ticket (or the TGT behind it) is no longer accepted by the application server. """
+    pass
+
+
 class BaseApp(object):
-    """ The base class for all etu nexus application API """
+    """ The base class for all etu nexus application API
+
+    An application instance is thread-safe: the service ticket is guarded by a lock during login/logout, and all
+    requests share the keep-alive connection pool of the bound CAS session. Independent API calls can be fanned out to
+    a thread pool with the same instance.
+
+    An expired service ticket (or TGT) is renewed transparently: a request answered by 401/403, or redirected to the
+    CAS login page, triggers one renewal and is replayed once. Concurrent callers wait for the same renewal.
+
+    NOTICE: Server-side session state (e.g. EI3 "su" login) is shared by all threads using the same CAS instance.
+    Use a separate CAS instance per simulated user in such cases.
+    """
 
     # Constants
     __common_headers = {
         'Content-type': 'application/json',
         'Accept': 'application/json, text/plain, */*',
+        'Accept-Encoding': 'gzip',
         'Pragma': 'no-cache'
     }
 
@@ -26,6 +55,19 @@ class BaseApp(object):
         'Content-type': 'application/x-www-form-urlencoded',
     }
 
+    __default_max_in_flight = 8
+    __default_chunk_size = 64 * 1024
+    __default_log_body_limit = 4096
+
+    # Response cache rules by the resource words of API paths (see enable_cache())
+    # Never cached: per-login or ever-changing resources
+    _cache_exempt = frozenset(['me', 'superme', 'audit'])
+    # A mutation on the key resource also invalidates the listed resources
+    _cache_dependencies = {}
+    # Any request on these resources changes the login identity, and clears the whole cache
+    _cache_reset = frozenset()
+    __default_download_retries = 3
+
     def __init__(self, cas, app_name, api_host, api_base, shiro_cas_base):
         """ Constructor
 
@@ -49,6 +91,11 @@ class BaseApp(object):
         self._shiro_cas_base = shiro_cas_base
 
         self._st = None
+        self._st_lock = threading.RLock()
+        self._max_in_flight = self.__default_max_in_flight
+        self._log_body_limit = self.__default_log_body_limit
+        self._json_codec = None
+        self._cache = None
         self._logger = get_logger()
 
     @property
@@ -80,14 +127,94 @@ class BaseApp(object):
     def logger(self, logger):
         self._logger = logger
 
+    @property
+    def log_body_limit(self):
+        """ Get max bytes of a request/response body in debug logs (None for no limit) """
+        return self._log_body_limit
+
+    @log_body_limit.setter
+    def log_body_limit(self, log_body_limit):
+        assert log_body_limit is None or log_body_limit >= 0
+        self._log_body_limit = log_body_limit
+
+    @property
+    def json_codec(self):
+        """ Get the JSON codec of requests/responses (the global default codec if not set) """
+        return self._json_codec if self._json_codec else get_default_codec()
+
+    @json_codec.setter
+    def json_codec(self, codec):
+        """ Set the JSON codec: a JSONCodec instance, a codec name (e.g. 'ujson', 'json', 'auto'), or None to use the
+        global default codec.
+        """
+        self._json_codec = codec if codec is None or isinstance(codec, JSONCodec) else get_codec(codec)
+
+    @property
+    def cache(self):
+        """ Get the response cache, or None if caching is disabled """
+        return self._cache
+
+    def enable_cache(self, max_entries=256, default_ttl=60, ttls=None, cache=None):
+        """ Enable the client-side cache of GET responses.
+
+        A GET response is cached by URL for the TTL of its resource. Any other request (add/update/delete) drops the
+        cached responses sharing a resource word with it, e.g. a POST to /group/3/user drops /group/3/user and /group.
+
+        Arguments:
+            max_entries (int): Max responses cached (LRU).
+            default_ttl (float): Seconds a response is cached for resources not in ttls. None to cache only the
+                                 resources in ttls.
+            ttls (dict): Resource word (e.g. "app", "role", "genecategory") to seconds.
+            cache (obj): A ResponseCache instance to use (e.g. shared by applications) instead of a new one.
+        Return:
+            The ResponseCache instance.
+        """
+        self._cache = cache if cache is not None else ResponseCache(max_entries, default_ttl, ttls)
+        return self._cache
+
+    def disable_cache(self):
+        """ Disable the response cache """
+        self._cache = None
+
+    def clear_cache(self):
+        """ Drop all cached responses """
+        if self._cache is not None:
+            self._cache.clear()
+
+    @staticmethod
+    def _resource_words(api):
+        # The non-numeric segments of the API path in order, e.g. ['group', 'user'] for /group/3/user
+        path = api.split('?', 1)[0]
+        return [x for x in path.split('/') if x and not x.isdigit()]
+
+    @property
+    def max_in_flight(self):
+        """ Get the default max concurrent calls of batch() """
+        return self._max_in_flight
+
+    @max_in_flight.setter
+    def max_in_flight(self, max_in_flight):
+        assert max_in_flight > 0
+        self._max_in_flight = max_in_flight
+
+    @property
+    def session(self):
+        """ Get the HTTP session (shared with the CAS instance) """
+        return self._cas.session
+
+    @property
+    def connection_pool(self):
+        """ Get the keep-alive connection pool (shared with the CAS instance) """
+        return self._cas.connection_pool
+
     def _resolve_cas_ticket_service(self):
         return 'https://{0}/cas/v1/tickets/{1}'.format(self._cas.cas_host, self._cas.tgt)
 
     def _resolve_shiro_url(self):
         return 'https://{0}{1}'.format(self._api_host, self._shiro_cas_base)
 
-    def _resolve_shiro_validation_url(self):
-        return '{0}?ticket={1}'.format(self._resolve_shiro_url(), self._st)
+    def _resolve_shiro_validation_url(self, st=None):
+        return '{0}?ticket={1}'.format(self._resolve_shiro_url(), st if st else self._st)
 
     def _resolve_api_url(self, api_postfix):
         return 'https://{0}{1}{2}'.format(self._api_host, self._api_base, api_postfix)
@@ -103,26 +230,54 @@ class BaseApp(object):
         headers['Content-Length'] = len(params)
 
         req = urllib2.Request(ticket_service, data=params, headers=headers)
-        self._st = urllib2.urlopen(req).read()
-        self.logger.debug('cas st (%s) for application (%s)' % (self._st, self._app_name))
+        st = self.session.open(req).read()
+        self.logger.debug('cas st (%s) for application (%s)' % (st, self._app_name))
 
         # Login service
-        url = self._resolve_shiro_validation_url()
+        url = self._resolve_shiro_validation_url(st)
         try:
-            urllib2.urlopen(url)
+            self.session.open(url).read()
         except urllib2.HTTPError as e:
             if e.getcode() != 403:
                 raise e
 
+        # Publish the ticket only after the service session is established, as other threads check it without lock
+        self._st = st
+
     def _login_service(self):
         # Login service
         shiro_validation = self._resolve_shiro_validation_url()
         try:
-            urllib2.urlopen(shiro_validation)
+            self.session.open(shiro_validation).read()
         except urllib2.HTTPError as e:
             if e.getcode() != 403:
                 raise e
 
+    def _renew_st(self, expired_st):
+        # Renew the service ticket once for all callers who saw the same expired one
+        with self._st_lock:
+            if self._st and self._st != expired_st:
+                return self._st
+
+            self._logger.info('Service ticket of %s expired. Renewing...' % self._app_name)
+            self._grant_st()
+            return self._st
+
+    def _grant_st(self):
+        tgt = self._cas.tgt
+        try:
+            self._request_st()
+        except urllib2.HTTPError as e:
+            # CAS rejects an expired/unknown TGT (e.g. a stale cached one) with 400/404. Renew the TGT and retry.
+            if e.getcode() not in (400, 404):
+                raise
+            self._logger.info('CAS TGT expired. Renewing...')
+            self._cas.renew(tgt)
+            self._request_st()
+
+    def _is_cas_login_url(self, url):
+        return url and '//{0}/cas/login'.format(self._cas.cas_host) in url
+
     def _check_login(self):
         if not self._st:
             self._logger.error('Please login service before firing API call.')
@@ -137,28 +292,28 @@ class BaseApp(object):
         Returns:
             str: The st granted, or None if failed.
         """
-        try:
-            if not self._st:
-                # Ensure login CAS done
-                self._cas.login()
-                # Make service login
-                self._request_st()
-                self._login_service()
-            return self._st
-        except Exception as e:
-            self._logger.error(e.message)
-            self._logger.debug(traceback.format_exc())
-            del self._st
-            raise e
+        with self._st_lock:
+            try:
+                if not self._st:
+                    # Ensure login CAS done
+                    self._cas.login()
+                    # Make service login (the service ticket is validated by shiro in the same step)
+                    self._grant_st()
+                return self._st
+            except Exception as e:
+                self._logger.error(e.message)
+                self._logger.debug(traceback.format_exc())
+                self._st = None
+                raise e
 
     def logout(self):
         """ Logout service with cleaning granted Service Ticket """
-        del self._st
+        with self._st_lock:
+            self._st = None
 
-    @staticmethod
-    def _convert_value(v):
+    def _convert_value(self, v):
         if isinstance(v, dict):
-            return json.dumps(v)
+            return self.json_codec.dumps(v)
         elif isinstance(v, str):
             return v
         elif isinstance(v, unicode):
@@ -166,16 +321,36 @@ class BaseApp(object):
         else:
             return str(v)
 
-    def _request(self, api, data=None, data_serializer=None, file=None, headers=None, method=None):
+    def _request(self, api, data=None, data_serializer=None, file=None, headers=None, method=None, filename=None,
+                 compress=False):
         if data:
             assert isinstance(data, dict)
+        codec = self.json_codec
         if data_serializer is None:
-            data_serializer = json.dumps
+            data_serializer = codec.dumps
         self._check_login()
 
         # Preparing data and headers if required
         url = self._resolve_api_url(api)
 
+        cache, cache_ttl, words = self._cache, None, None
+        if cache is not None:
+            words = self._resource_words(api)
+            if self._cache_reset.intersection(words):
+                cache.clear()
+                cache = None
+            elif not data and not method and not self._cache_exempt.intersection(words):
+                cache_ttl = cache.ttl(words)
+                if cache_ttl is not None:
+                    cached = cache.get(url)
+                    if cached is not None:
+                        self._logger.debug('Response of %s from cache', url)
+                        return cached
+                    conditional_headers = cache.conditional_headers(url)
+                    if conditional_headers:
+                        conditional_headers.update(headers if headers else {})
+                        headers = conditional_headers
+
         final_headers = self.__common_headers.copy()
         if headers:
             final_headers.update(headers)
@@ -183,49 +358,184 @@ class BaseApp(object):
         final_data = None
         if data:
             if file:
-                final_data = dict([(k, self._convert_value(v)) for k, v in data.iteritems() if v is not None])
-                # [IMPORTANT] Force transform all values to str while MultipartPostHandler append it with str directly.
-                # /Library/Python/2.7/site-packages/MultipartPostHandler-0.1.0-py2.7.egg/MultipartPostHandler.pyc in multipart_encode(vars, files, boundary, buffer)
-                # 91             buffer += '--%s\r\n' % boundary
-                # 92             buffer += 'Content-Disposition: form-data; name="%s"' % key
-                # ---> 93             buffer += '\r\n\r\n' + value + '\r\n'
-                # 94         for(key, fd) in files:
-                # 95             file_size = os.fstat(fd.fileno())[stat.ST_SIZE]
-                #
-                # TypeError: cannot concatenate 'str' and 'int' objects
-
-                final_data.update({'file': open(file, 'rb')})
-                self._logger.debug('Upload file. The content length is calculated before sending request. Not set here.')
+                # The multipart body is streamed from the file while sending. All field values must be str.
+                if isinstance(data, LazyModel):
+                    # Reuse the encodings of unchanged fields, without converting the fields not accessed yet
+                    fields = [(k, v) for k, v in data.encode_fields(self._convert_value) if v is not None]
+                else:
+                    fields = [(k, self._convert_value(v)) for k, v in data.iteritems() if v is not None]
+                encoder = MultipartEncoder(fields, [('file', file, filename)])
+                final_headers['Content-type'] = encoder.content_type
+                if compress:
+                    try:
+                        final_data, length = gzip_spool(encoder)
+                    finally:
+                        encoder.close()
+                    final_headers['Content-Encoding'] = 'gzip'
+                    self._logger.debug('Upload gzip file. %d bytes compressed to %d', len(encoder), length)
+                else:
+                    final_data, length = encoder, len(encoder)
+                final_headers['Content-Length'] = length
+                self._logger.debug('Upload file. Set content length to %d', length)
             else:
-                final_data = data_serializer(data)
-                self._logger.debug('Pure post data. Set content length to %d' % len(final_data))
+                if isinstance(data, LazyModel) and data_serializer is codec.dumps:
+                    final_data = data.to_wire(data_serializer)
+                else:
+                    final_data = data_serializer(data)
+                self._logger.debug('Pure post data. Set content length to %d', len(final_data))
                 final_headers['Content-Length'] = len(final_data)
         else:
             self._logger.debug('No data in request. No content length set.')
 
         # fire api
-        req = urllib2.Request(url, data=final_data, headers=final_headers)
+        try:
+            response = self._open_api(url, final_data, final_headers, method)
+            res = response.read()
+        except urllib2.HTTPError as e:
+            if e.getcode() != 304 or cache_ttl is None:
+                raise
+            e.close()
+            cached = cache.revalidate(url, cache_ttl)
+            if cached is not None:
+                self._logger.debug('Response of %s not modified. Served from cache', url)
+                return cached
+            # Invalidated meanwhile. Fetch it again without the validators.
+            final_headers.pop('If-None-Match', None)
+            final_headers.pop('If-Modified-Since', None)
+            self._rewind_body(final_data)
+            response = self._open_api(url, final_data, final_headers, method)
+            res = response.read()
+        finally:
+            if file and data:
+                final_data.close()
+            if cache is not None and (data or method):
+                # Even a failed mutation may have been applied partially
+                dependencies = [self._cache_dependencies.get(x, ()) for x in words]
+                cache.invalidate(set(words).union(*dependencies))
+        if self._logger.isEnabledFor(logging.DEBUG):
+            self._logger.debug('Response: %s', self._log_body(res))
+        try:
+            result = codec.loads(res)
+        except ValueError as e:
+            self._logger.error('%s error: Illegal response (%s) from server',
+                               traceback.extract_stack()[-3][2], self._log_body(res))
+            raise
+        if cache_ttl is not None:
+            info = response.info()
+            cache.put(url, result, cache_ttl, words,
+                      {'ETag': info.getheader('ETag'), 'Last-Modified': info.getheader('Last-Modified')})
+        return result
+
+    def _open_api(self, url, data=None, headers=None, method=None):
+        # Open an API url. Renew the service ticket and replay the request once if the ticket expired.
+        st = self._st
+        try:
+            return self._open_request(url, data, headers, method, renewable=True)
+        except _TicketExpired:
+            self._renew_st(st)
+            self._rewind_body(data)
+            return self._open_request(url, data, headers, method)
+
+    @staticmethod
+    def _rewind_body(data):
+        # A streamed body (multipart encoder, gzip spool file) is consumed by the first send. Rewind it to resend.
+        if data is None or isinstance(data, basestring):
+            return
+        if not hasattr(data, 'seek'):
+            raise Exception('Failed to resend the request. The request body cannot be rewound.')
+        data.seek(0)
+
+    def _open_request(self, url, data=None, headers=None, method=None, renewable=False):
+        # Make a new Request every time, as the cookie processor would stick the stale session cookie in a reused one
+        req = urllib2.Request(url, data=data, headers=headers if headers else {})
         if method:
             req.get_method = lambda: method
-        self._logger.debug('%s %s' % (req.get_method(), url))
-        self._logger.debug('Request header: %s' % str(req.headers))
-        self._logger.debug("Request has body: %s. Request body: %s" %
-                            (('Yes' if req.has_data() else 'No'), req.get_data()))
+        if self._logger.isEnabledFor(logging.DEBUG):
+            self._logger.debug('%s %s', req.get_method(), url)
+            self._logger.debug('Request header: %s', req.headers)
+            self._logger.debug('Request has body: %s. Request body: %s',
+                               'Yes' if req.has_data() else 'No', self._log_body(req.get_data()))
 
-        res = urllib2.urlopen(req).read()
-        self._logger.debug('Response: %s' % res)
         try:
-            return json.loads(res)
-        except ValueError as e:
-            self._logger.error('%s error: Illegal response (%s) from server' % (traceback.extract_stack()[-3][2], res))
+            res = self.session.open(req)
+        except urllib2.HTTPError as e:
+            if renewable and e.getcode() in (401, 403):
+                e.close()
+                raise _TicketExpired(e)
             raise
 
-    def _download(self, url, save_path):
+        if self._is_cas_login_url(res.geturl()):
+            res.close()
+            if renewable:
+                raise _TicketExpired(res.geturl())
+            raise Exception('Failed to login service %s. Redirected to CAS login.' % self._app_name)
+        return res
+
+    def _log_body(self, body):
+        # Streamed bodies are not read for logging. Others are cut to log_body_limit bytes.
+        if body is None or isinstance(body, basestring):
+            limit = self._log_body_limit
+            if body is None or limit is None or len(body) <= limit:
+                return body
+            return '%s...(%d bytes truncated)' % (body[:limit], len(body) - limit)
+        return '<streamed body>'
+
+    def _download(self, url, save_path, chunk_size=None, resume=True, checksum=None, checksum_algorithm='md5',
+                  progress=None):
         self._check_login()
 
-        res = urllib2.urlopen(url)
+        chunk_size = chunk_size if chunk_size else self.__default_chunk_size
+        hasher = hashlib.new(checksum_algorithm) if checksum else None
+        retries = self.__default_download_retries if resume else 0
+        done = 0
+        total = None
+        validator = None
+        start_time = time.time()
+
         with open(save_path, 'wb') as output:
-            output.write(res.read())
+            headers = None
+            while True:
+                res = self._open_api(url, headers=headers)
+                if headers and res.getcode() != 206:
+                    # The server ignored the range request (or the file changed). Start over.
+                    self._logger.debug('Server does not resume %s. Restart the download.', url)
+                    output.seek(0)
+                    output.truncate()
+                    hasher = hashlib.new(checksum_algorithm) if checksum else None
+                    done = 0
+                if done == 0:
+                    length = res.info().getheader('Content-Length')
+                    total = int(length) if length else None
+                    validator = res.info().getheader('ETag') or res.info().getheader('Last-Modified')
+
+                try:
+                    while True:
+                        chunk = res.read(chunk_size)
+                        if not chunk:
+                            break
+                        output.write(chunk)
+                        if hasher:
+                            hasher.update(chunk)
+                        done += len(chunk)
+                        if progress:
+                            progress(done, total, done / max(time.time() - start_time, 1e-6))
+                    if total is not None and done < total:
+                        raise httplib.IncompleteRead('', total - done)
+                    break
+                except (socket.error, httplib.HTTPException, urllib2.URLError) as e:
+                    if retries <= 0:
+                        raise
+                    retries -= 1
+                    self._logger.info('Download of %s interrupted at %d bytes (%s). Resuming...', url, done, e)
+                    headers = {'Range': 'bytes=%d-' % done}
+                    if validator:
+                        headers['If-Range'] = validator
+                finally:
+                    res.close()
+
+        if checksum and hasher.hexdigest().lower() != checksum.lower():
+            os.remove(save_path)
+            raise Exception('Checksum mismatch of %s. Expected %s, got %s.' % (url, checksum, hasher.hexdigest()))
 
         return save_path
 
@@ -253,11 +563,148 @@ class BaseApp(object):
     def request_del(self, api, headers=None):
         return self._request(api, headers=headers, method='DELETE')
 
-    def request_upload(self, api, data, file, headers=None):
-        return self._request(api, data=data, file=file, headers=headers)
+    def request_upload(self, api, data, file, headers=None, filename=None, compress=False):
+        """ Upload a file with form fields as a streamed multipart/form-data request.
+
+        Arguments:
+            api (str): The API path.
+            data (dict): The form fields.
+            file (str or obj): The file path, or a file-like object, or a generator of str chunks to upload.
+            headers (dict): Extra request headers.
+            filename (str): The file name sent to the server. The base name of the file path is used if omitted.
+            compress (bool): Send the body gzip compressed (Content-Encoding: gzip), or not. Only for servers
+                             accepting compressed requests.
+        Return:
+            The decoded JSON response.
+        """
+        return self._request(api, data=data, file=file, headers=headers, filename=filename, compress=compress)
+
+    def request_download(self, url, save_path, chunk_size=None, resume=True, checksum=None, checksum_algorithm='md5',
+                         progress=None):
+        """ Download a file to disk, streaming the body in chunks.
+
+        Arguments:
+            url (str): The url to download.
+            save_path (str): The file path to save.
+            chunk_size (int): Bytes to read/write at a time. Default: 64KB
+            resume (bool): Resume with a HTTP Range request if the connection drops, or not.
+            checksum (str): The expected hex digest of the file. Not checked if omitted.
+            checksum_algorithm (str): The hashlib algorithm name of the checksum, e.g. 'md5', 'sha256'.
+            progress (callable): Called as progress(bytes_done, total_bytes, bytes_per_second) after each chunk.
+                                 total_bytes is None if the server does not tell the size.
+        Return:
+            The save_path in argument.
+        """
+        return self._download(url, save_path, chunk_size, resume, checksum, checksum_algorithm, progress)
+
+    def request_iter(self, api, path=None, headers=None):
+        """ GET an API returning a (large) JSON array, and iterate the items as the response arrives.
+
+        Only one item is decoded and kept in memory at a time. The items are plain decoded JSON values.
+
+        Arguments:
+            api (str): The API path.
+            path (list): The object keys to the array in the response, e.g. ['data']. The response must be the array
+                         itself if omitted.
+            headers (dict): Extra request headers.
+        Return:
+            A generator of the array items.
+        """
+        self._check_login()
+        url = self._resolve_api_url(api)
+        final_headers = self.__common_headers.copy()
+        if headers:
+            final_headers.update(headers)
+        res = self._open_api(url, headers=final_headers)
+        try:
+            for item in iter_json_array(res, path, codec=self.json_codec):
+                yield item
+        finally:
+            res.close()
+
+    def request_stream(self, url):
+        """ Open a url and return the response to read the body incrementally.
+
+        The caller must read the body to the end (or close the response) to release the connection.
 
-    def request_download(self, url, save_path):
-        return self._download(url, save_path)
+        Arguments:
+            url (str): The url to open.
+        Return:
+            The response file-like object.
+        """
+        self._check_login()
+        return self._open_api(url)
+
+    def batch(self, func, items, max_in_flight=None):
+        """ Call func(item) for every item concurrently, with bounded calls in flight.
+
+        A failed call does not stop the others. Check the "ok" and "error" of each result.
+
+        Arguments:
+            func (callable): The function to call, usually a method of the application, e.g. ei3.del_band.
+            items (list): The items to call with.
+            max_in_flight (int): Max concurrent calls. The "max_in_flight" of the application is used if omitted.
+        Return:
+            A list of BatchResult instances in the same order as items.
+        """
+        items = list(items)
+        if not items:
+            return []
+        max_in_flight = max_in_flight if max_in_flight else self._max_in_flight
+        results = []
+        with Executor(min(max_in_flight, len(items))) as executor:
+            for item, future in zip(items, executor.map(func, items)):
+                error = future.exception()
+                results.append(BatchResult(item, future.result()) if error is None else BatchResult(item, error=error))
+        return results
+
+
+class AsyncApp(object):
+    """ The base class for the asynchronous edition of an application API.
+
+    An asynchronous application wraps an application instance (the "_app_class" of the derived class) and runs every
+    public method in an Executor. Each call returns immediately with a Future instance, and the Future.result() is
+    exactly the same as the return value of the synchronous method, e.g. a list of Group instances.
+
+    The wrapped application instance is thread-safe, so many calls (including login()) can be in flight at the same
+    time, all sharing the session of the CAS instance. The concurrency is bounded by the executor.
+    """
+
+    _app_class = None
+
+    def __init__(self, cas, *args, **kwargs):
+        """ Constructor
+
+        Args:
+            cas (object): A valid CAS instance
+            executor (object): The Executor instance to run calls. A new one with default settings is created if
+                               omitted. It could be shared among asynchronous applications.
+            (Other arguments are passed to the constructor of the application class.)
+        """
+        assert self._app_class and issubclass(self._app_class, BaseApp)
+        executor = kwargs.pop('executor', None)
+        self._app = self._app_class(cas, *args, **kwargs)
+        self._executor = executor if executor is not None else Executor()
+
+    @property
+    def app(self):
+        """ Get the wrapped (synchronous) application instance """
+        return self._app
+
+    @property
+    def executor(self):
+        """ Get the executor """
+        return self._executor
+
+    def __getattr__(self, name):
+        attr = getattr(self._app, name)
+        if name.startswith('_') or not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        def submit(*args, **kwargs):
+            return self._executor.submit(attr, *args, **kwargs)
+        return submit
 
 
 class BaseAppDict(dict):
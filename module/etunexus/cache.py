@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+
+import time
+import threading
+from collections import OrderedDict
+
+
+def _clone_json(obj):
+    # Copy a decoded JSON value, so a caller modifying its result never touches the cached one
+    if isinstance(obj, dict):
+        return dict([(k, _clone_json(v)) for k, v in obj.iteritems()])
+    if isinstance(obj, list):
+        return [_clone_json(x) for x in obj]
+    return obj
+
+
+class ResponseCache(object):
+    """ Size-bounded LRU cache of decoded API responses with per-entry TTL.
+
+    Entries are keyed by URL and tagged with the resource words of the URL path (e.g. "group" and "user" for
+    /group/3/user), so a mutation on a resource can drop every cached response involving it. Values are stored as
+    decoded JSON and returned as copies.
+
+    An entry with validators (ETag/Last-Modified of the response) is kept after its TTL, so it can be revalidated with
+    a conditional request and served again on "304 Not Modified".
+
+    It is safe to share a cache among threads.
+    """
+
+    def __init__(self, max_entries=256, default_ttl=60, ttls=None):
+        """ Constructor
+
+        Args:
+            max_entries (int): Max entries kept. The least recently used one is evicted beyond that.
+            default_ttl (float): Seconds a response is cached for resources not in ttls. None to cache only the
+                                 resources in ttls.
+            ttls (dict): Resource word to seconds, e.g. {"role": 3600} for /app/{id}/role. The last word of a URL path
+                         with a TTL here decides, so {"app": 3600} covers everything under /app.
+        """
+        assert max_entries > 0
+        self._max_entries = max_entries
+        self._default_ttl = default_ttl
+        self._ttls = dict(ttls) if ttls else {}
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'invalidations': 0,
+            'revalidations': 0
+        }
+
+    @property
+    def max_entries(self):
+        """ Get max entries kept """
+        return self._max_entries
+
+    @property
+    def stats(self):
+        """ Get cache statistics
+
+        Returns:
+            dict: Counters of hits, misses, evictions (LRU or expired), invalidations and revalidations (served on
+            304), plus "size" as the number of entries currently cached.
+        """
+        with self._lock:
+            stats = self._stats.copy()
+            stats['size'] = len(self._entries)
+        return stats
+
+    def ttl(self, words):
+        """ Get the TTL of a URL.
+
+        Args:
+            words (list): The resource words of the URL path in order. The last one with a TTL in ttls decides.
+        Returns:
+            float: Seconds to cache, or None if it is not cached.
+        """
+        for word in reversed(words):
+            if word in self._ttls:
+                return self._ttls[word]
+        return self._default_ttl
+
+    def get(self, key):
+        """ Get a copy of the cached value, or None if missing or expired. """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+            value, expires, _, validators = entry
+            if expires < time.time():
+                if not validators:
+                    del self._entries[key]
+                    self._stats['evictions'] += 1
+                self._stats['misses'] += 1
+                return None
+            # Move to the most recently used end
+            del self._entries[key]
+            self._entries[key] = entry
+            self._stats['hits'] += 1
+        return _clone_json(value)
+
+    def conditional_headers(self, key):
+        """ Get the headers to revalidate an expired entry, e.g. {"If-None-Match": etag}, or None if not possible. """
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or not entry[3]:
+            return None
+        headers = {}
+        if entry[3].get('ETag'):
+            headers['If-None-Match'] = entry[3]['ETag']
+        if entry[3].get('Last-Modified'):
+            headers['If-Modified-Since'] = entry[3]['Last-Modified']
+        return headers
+
+    def revalidate(self, key, ttl):
+        """ Renew an entry confirmed by the server (304) for another TTL.
+
+        Returns:
+            A copy of the cached value, or None if the entry is gone meanwhile.
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return None
+            value, _, words, validators = entry
+            self._entries[key] = (value, time.time() + ttl, words, validators)
+            self._stats['revalidations'] += 1
+        return _clone_json(value)
+
+    def put(self, key, value, ttl, words, validators=None):
+        """ Cache a decoded value.
+
+        Args:
+            key (str): The URL.
+            value (obj): The decoded JSON value.
+            ttl (float): Seconds to keep it. 0 to revalidate it on every use (validators required).
+            words (list): The resource words of the URL.
+            validators (dict): The "ETag" and/or "Last-Modified" response headers.
+        """
+        validators = dict([(k, v) for k, v in (validators or {}).iteritems() if v])
+        if ttl <= 0 and not validators:
+            return
+        entry = (_clone_json(value), time.time() + ttl, frozenset(words), validators)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = entry
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def invalidate(self, words):
+        """ Drop the entries tagged with any of the resource words. """
+        words = frozenset(words)
+        with self._lock:
+            keys = [k for k, v in self._entries.iteritems() if v[2] & words]
+            for k in keys:
+                del self._entries[k]
+            self._stats['invalidations'] += len(keys)
+
+    def clear(self):
+        """ Drop all entries. """
+        with self._lock:
+            self._stats['invalidations'] += len(self._entries)
+            self._entries.clear()
@@ -2,18 +2,18 @@
 
 import urllib
 import urllib2
-import cookielib
-import ssl
 import traceback
 import logging
-import MultipartPostHandler
+import threading
 
-from . import API_USER_AGENT
 from logger import get_logger
+from session import Session
 
 
 class CAS(object):
     """ Encapsulate CAS SSO authentication
+
+    A CAS instance is thread-safe. Concurrent login() calls share a single TGT request.
     """
 
     # Constants
@@ -26,7 +26,8 @@ class CAS(object):
     }
 
     # Methods
-    def __init__(self, cas_group, cas_username, cas_password, cas_host=None, secure=True, loglevel=logging.INFO):
+    def __init__(self, cas_group, cas_username, cas_password, cas_host=None, secure=True, loglevel=logging.INFO,
+                 connection_pool=None, ticket_cache=None):
         """ Constructor
 
         Args:
@@ -36,6 +37,12 @@ class CAS(object):
             cas_host (str): The host/IP of the CAS server
             secure (bool): Enable the certificate check or not
             loglevel (int): Log level
+            connection_pool (object): The ConnectionPool instance for keep-alive connections to CAS and application
+                                      hosts. A new one with default settings is created if omitted.
+            ticket_cache (object): The TicketCache instance to reuse the TGT among processes. No cache if omitted.
+
+        Each CAS instance has its own Session (cookies, TLS context, and connections) shared by the application
+        instances bound to it. Different CAS instances do not interfere with each other.
         """
         assert cas_group and len(cas_group) > 0
         self._cas_group = cas_group
@@ -46,31 +53,14 @@ class CAS(object):
 
         self._cas_host = self.__sso_cas_host if not cas_host else cas_host
         self._tgt = None
+        self._tgt_lock = threading.Lock()
+        self._ticket_cache = ticket_cache
         self._logger = get_logger(loglevel)
 
-        # Init urllib2
-        self._init_urllib(secure)
+        self._session = Session(secure, connection_pool)
 
         self._logger.debug("CAS object (%s,%s,%s,%s) constructed" % (cas_host, cas_group, cas_username, cas_password))
 
-    def _init_urllib(self, secure, debuglevel=0):
-        cj = cookielib.CookieJar()
-        no_proxy_support = urllib2.ProxyHandler({})
-        cookie_handler = urllib2.HTTPCookieProcessor(cj)
-        ctx = None
-        if not secure:
-            self._logger.info('[WARNING] Skip certificate verification.')
-            ctx = ssl.create_default_context()
-            ctx.check_hostname = False
-            ctx.verify_mode = ssl.CERT_NONE
-        https_handler = urllib2.HTTPSHandler(debuglevel=debuglevel, context=ctx)
-        opener = urllib2.build_opener(no_proxy_support,
-                                      cookie_handler,
-                                      https_handler,
-                                      MultipartPostHandler.MultipartPostHandler)
-        opener.addheaders = [('User-agent', API_USER_AGENT)]
-        urllib2.install_opener(opener)
-
     @property
     def logger(self):
         """ Get logger """
@@ -80,6 +70,16 @@ class CAS(object):
     def logger(self, logger):
         self._logger = logger
 
+    @property
+    def session(self):
+        """ Get the HTTP session shared by all requests through this CAS """
+        return self._session
+
+    @property
+    def connection_pool(self):
+        """ Get the connection pool shared by all requests through this CAS """
+        return self._session.connection_pool
+
     @property
     def cas_host(self):
         """ Get CAS host """
@@ -120,6 +120,11 @@ class CAS(object):
         self._logger.debug("set cas password: %s" % cas_password)
         self._cas_password = cas_password
 
+    @property
+    def ticket_cache(self):
+        """ Get the TGT cache """
+        return self._ticket_cache
+
     @property
     def tgt(self):
         """ Get Ticket Granting Ticket (TGT) """
@@ -131,18 +136,53 @@ class CAS(object):
         Grab the Ticket Granting Ticket (TGT)
         Reference : https://wiki.jasig.org/display/casum/restful+api
 
+        With a ticket cache, a cached TGT is used without contacting CAS. It is renewed later only if the server rejects
+        it.
+
         Returns:
             str: The tgt granted, or None if failed.
         """
         try:
-            if not self._tgt:
-                self._tgt = self._request_tgt()
+            with self._tgt_lock:
+                if not self._tgt and self._ticket_cache:
+                    self._tgt = self._ticket_cache.load(self._cas_host, self._cas_group, self._cas_username,
+                                                        self._cas_password)
+                    if self._tgt:
+                        self._logger.debug('cas tgt from cache: %s' % self._tgt)
+                if not self._tgt:
+                    self._tgt = self._request_and_cache_tgt()
             return self._tgt
         except Exception as e:
             self._logger.error(e.message)
             self._logger.debug(traceback.format_exc())
             return None
 
+    def renew(self, expired_tgt=None):
+        """ Renew the Ticket Granting Ticket (TGT)
+
+        Concurrent callers holding the same expired TGT share a single renewal. If the TGT has been renewed already
+        (it differs from expired_tgt), the current one is returned without another request.
+
+        Args:
+            expired_tgt (str): The TGT known to be expired.
+        Returns:
+            str: The renewed tgt.
+        """
+        with self._tgt_lock:
+            if not self._tgt or self._tgt == expired_tgt:
+                self._tgt = None
+                self._tgt = self._request_and_cache_tgt()
+            return self._tgt
+
+    def _request_and_cache_tgt(self):
+        tgt = self._request_tgt()
+        if self._ticket_cache:
+            try:
+                self._ticket_cache.save(self._cas_host, self._cas_group, self._cas_username, self._cas_password, tgt)
+            except (IOError, OSError) as e:
+                self._logger.warning('Failed to save TGT cache: %s' % e)
+        return tgt
+
     def _request_tgt(self):
         """ Get Ticket Grant Ticket
         """
@@ -157,7 +197,8 @@ class CAS(object):
         headers['Content-Length'] = len(params)
 
         req = urllib2.Request(ticket_service, data=params, headers=headers)
-        res = urllib2.urlopen(req)
+        res = self._session.open(req)
+        res.read()
 
         if not (res.getcode() / 100) == 2:
             raise Exception("Authentication failed. Please check the host and authentication information.")
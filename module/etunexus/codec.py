@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+
+import json
+import threading
+
+from logger import get_logger
+
+
+class JSONCodec(object):
+    """ A named pair of JSON dumps/loads functions used to serialize requests and parse responses. """
+
+    def __init__(self, name, dumps, loads, raw_decode=None):
+        """ Constructor
+
+        Args:
+            name (str): The codec name.
+            dumps (callable): Serialize an object to a JSON str.
+            loads (callable): Parse a JSON str to an object.
+            raw_decode (callable): Parse one JSON value of a str from an index, as raw_decode(s, idx) returning
+                                   (object, end index), to parse streamed documents. None if the library has none, and
+                                   the streaming parser finds the end of each value to parse it with loads.
+        """
+        assert name and callable(dumps) and callable(loads)
+        assert raw_decode is None or callable(raw_decode)
+        self._name = name
+        self.dumps = dumps
+        self.loads = loads
+        self.raw_decode = raw_decode
+
+    @property
+    def name(self):
+        """ Get codec name """
+        return self._name
+
+    def __repr__(self):
+        return 'JSONCodec(%s)' % self._name
+
+
+def _ujson_codec():
+    import ujson
+    # Keep "/" unescaped as the stdlib does
+    return JSONCodec('ujson', lambda obj: ujson.dumps(obj, escape_forward_slashes=False), ujson.loads)
+
+
+def _simplejson_codec():
+    import simplejson
+    return JSONCodec('simplejson', simplejson.dumps, simplejson.loads, simplejson.JSONDecoder().raw_decode)
+
+
+def _stdlib_codec():
+    return JSONCodec('json', json.dumps, json.loads, json.JSONDecoder().raw_decode)
+
+
+# Known codecs from the fastest. "auto" picks the first one installed.
+_codec_factories = [
+    ('ujson', _ujson_codec),
+    ('simplejson', _simplejson_codec),
+    ('json', _stdlib_codec)
+]
+
+_lock = threading.Lock()
+_loaded = {}
+_default_codec = None
+
+
+def _load(name):
+    with _lock:
+        if name not in _loaded:
+            factory = dict(_codec_factories).get(name)
+            if factory is None:
+                raise ValueError('Unknown JSON codec: %s' % name)
+            try:
+                _loaded[name] = factory()
+            except ImportError:
+                _loaded[name] = None
+        return _loaded[name]
+
+
+def available_codecs():
+    """ Get the names of the codecs installed, from the fastest.
+
+    Returns:
+        list: The codec names.
+    """
+    return [name for name, _ in _codec_factories if _load(name)]
+
+
+def get_codec(name='auto'):
+    """ Get a codec by name.
+
+    Args:
+        name (str): 'ujson', 'simplejson', 'json' (stdlib), or 'auto' for the fastest one installed.
+    Returns:
+        A JSONCodec instance.
+    """
+    if name == 'auto':
+        return _load(available_codecs()[0])
+    codec = _load(name)
+    if codec is None:
+        raise ImportError('JSON codec %s is not installed.' % name)
+    return codec
+
+
+def get_default_codec():
+    """ Get the codec used by applications without their own codec set. It is the fastest one installed by default.
+    """
+    global _default_codec
+    if _default_codec is None:
+        _default_codec = get_codec('auto')
+        get_logger().debug('Use JSON codec: %s', _default_codec.name)
+    return _default_codec
+
+
+def set_default_codec(codec):
+    """ Set the codec used by applications without their own codec set.
+
+    Args:
+        codec (obj or str): A JSONCodec instance, or a codec name accepted by get_codec().
+    """
+    global _default_codec
+    _default_codec = codec if isinstance(codec, JSONCodec) else get_codec(codec)
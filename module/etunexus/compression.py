@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+
+import zlib
+import urllib
+import urllib2
+import tempfile
+
+
+class GzipDecodedResponse(object):
+    """ File-like wrapper decompressing a gzip (or deflate) encoded response body on the fly.
+
+    Only a chunk of the compressed body is read at a time, so a large response is never held in memory twice.
+    """
+
+    __chunk_size = 64 * 1024
+
+    def __init__(self, fp, encoding='gzip'):
+        """ Constructor
+
+        Args:
+            fp (object): The file-like object of the encoded body.
+            encoding (str): The content encoding, 'gzip' or 'deflate'.
+        """
+        self._fp = fp
+        # 16 + MAX_WBITS expects the gzip header/trailer. A raw deflate stream is detected on the first chunk.
+        self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS if encoding == 'gzip' else zlib.MAX_WBITS)
+        self._encoding = encoding
+        self._first = True
+        self._buffer = ''
+        self._eof = False
+
+    def _fill(self, size):
+        while not self._eof and (size < 0 or len(self._buffer) < size):
+            chunk = self._fp.read(self.__chunk_size)
+            if not chunk:
+                self._buffer += self._decompressor.flush()
+                self._eof = True
+                break
+            if self._first and self._encoding == 'deflate':
+                self._first = False
+                try:
+                    self._buffer += self._decompressor.decompress(chunk)
+                except zlib.error:
+                    # Some servers send a raw deflate stream without the zlib header
+                    self._decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+                    self._buffer += self._decompressor.decompress(chunk)
+                continue
+            self._buffer += self._decompressor.decompress(chunk)
+
+    def read(self, amt=None):
+        size = amt if amt is not None else -1
+        self._fill(size)
+        if size < 0:
+            data, self._buffer = self._buffer, ''
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+    def readline(self, limit=-1):
+        while '\n' not in self._buffer and not self._eof and (limit < 0 or len(self._buffer) < limit):
+            self._fill(len(self._buffer) + 1)
+        end = self._buffer.find('\n') + 1
+        if end <= 0:
+            end = len(self._buffer)
+        if 0 <= limit < end:
+            end = limit
+        line, self._buffer = self._buffer[:end], self._buffer[end:]
+        return line
+
+    def readlines(self, sizehint=0):
+        return list(iter(self.readline, ''))
+
+    def __iter__(self):
+        return iter(self.readline, '')
+
+    def fileno(self):
+        return self._fp.fileno()
+
+    def close(self):
+        self._fp.close()
+
+
+class GzipProcessor(urllib2.BaseHandler):
+    """ urllib2 processor decoding gzip/deflate encoded responses transparently.
+
+    The decoded response has no Content-Encoding and Content-Length headers, as they describe the encoded body.
+    """
+
+    def http_response(self, req, response):
+        encoding = (response.info().getheader('Content-Encoding') or '').strip().lower()
+        if encoding not in ('gzip', 'x-gzip', 'deflate'):
+            return response
+
+        headers = response.info()
+        del headers['Content-Encoding']
+        del headers['Content-Length']
+        fp = GzipDecodedResponse(response, 'deflate' if encoding == 'deflate' else 'gzip')
+        decoded = urllib.addinfourl(fp, headers, response.geturl(), response.getcode())
+        decoded.msg = response.msg
+        return decoded
+
+    https_response = http_response
+
+
+def gzip_spool(fp, chunk_size=64 * 1024):
+    """ Compress a file-like object with gzip into a temporary file, chunk by chunk.
+
+    Args:
+        fp (object): The file-like object to compress.
+        chunk_size (int): Bytes to read at a time.
+    Returns:
+        tuple: (the temporary file rewound to the beginning, the compressed size)
+    """
+    output = tempfile.TemporaryFile()
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    while True:
+        chunk = fp.read(chunk_size)
+        if not chunk:
+            break
+        output.write(compressor.compress(chunk))
+    output.write(compressor.flush())
+    size = output.tell()
+    output.seek(0)
+    return output, size
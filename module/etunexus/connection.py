@@ -0,0 +1,294 @@
+# -*- coding: utf-8 -*-
+
+import time
+import select
+import socket
+import httplib
+import urllib
+import urllib2
+import threading
+
+from logger import get_logger
+
+
+class ConnectionPool(object):
+    """ Per-host pool of persistent (HTTP/1.1 keep-alive) connections.
+
+    Connections are keyed by (scheme, host:port, TLS context). A connection is checked out for exactly one
+    request/response cycle and put back to the pool once the response body is fully consumed. The pool does not limit
+    or block callers: when all pooled connections are busy a new one is opened, and at most "max_idle" idle connections
+    per host are kept for reuse (the rest are closed on release). Bound the concurrent requests by the callers instead,
+    e.g. BaseApp.max_in_flight.
+
+    It is safe to share a pool among threads.
+    """
+
+    def __init__(self, max_idle=10, idle_timeout=60):
+        """ Constructor
+
+        Args:
+            max_idle (int): Max idle connections kept per host. It does not limit the connections checked out.
+            idle_timeout (int): Seconds an idle connection can stay in the pool before being dropped.
+        """
+        assert max_idle > 0
+        self._max_idle = max_idle
+        assert idle_timeout > 0
+        self._idle_timeout = idle_timeout
+
+        self._lock = threading.Lock()
+        self._idle = {}
+        self._stats = {
+            'created': 0,
+            'reused': 0,
+            'released': 0,
+            'discarded': 0,
+            'expired': 0
+        }
+
+    @property
+    def max_idle(self):
+        """ Get max idle connections kept per host """
+        return self._max_idle
+
+    @property
+    def idle_timeout(self):
+        """ Get idle timeout (seconds) """
+        return self._idle_timeout
+
+    @property
+    def stats(self):
+        """ Get pool statistics
+
+        Returns:
+            dict: Counters of connections created, reused, released (back to pool), discarded, and expired (idle too
+            long), plus "idle" as the number of connections currently kept in the pool.
+        """
+        with self._lock:
+            stats = self._stats.copy()
+            stats['idle'] = sum([len(x) for x in self._idle.itervalues()])
+        return stats
+
+    @staticmethod
+    def _is_dropped(conn):
+        # An idle keep-alive socket becomes readable only when the server closed it (or sent garbage).
+        sock = conn.sock
+        if sock is None:
+            return True
+        try:
+            readable, _, _ = select.select([sock], [], [], 0)
+        except (select.error, socket.error, ValueError):
+            return True
+        return bool(readable)
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def acquire(self, key, factory):
+        """ Check out an idle connection for the key, or create a new one with factory().
+
+        Returns:
+            tuple: (connection, reused)
+        """
+        while True:
+            with self._lock:
+                idle = self._idle.get(key)
+                conn, last_used = idle.pop() if idle else (None, None)
+            if conn is None:
+                break
+            if time.time() - last_used > self._idle_timeout or self._is_dropped(conn):
+                conn.close()
+                self._count('expired')
+                continue
+            self._count('reused')
+            return conn, True
+
+        return self.create(factory), False
+
+    def create(self, factory):
+        """ Create a new connection with factory() bypassing the idle connections. """
+        self._count('created')
+        return factory()
+
+    def release(self, key, conn):
+        """ Put a connection with a fully consumed response back to the pool. """
+        overflow = False
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self._max_idle:
+                idle.append((conn, time.time()))
+                self._stats['released'] += 1
+            else:
+                overflow = True
+                self._stats['discarded'] += 1
+        if overflow:
+            conn.close()
+
+    def discard(self, conn):
+        """ Close a connection that must not be reused. """
+        self._count('discarded')
+        conn.close()
+
+    def close(self):
+        """ Close all idle connections. """
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for conns in idle.itervalues():
+            for conn, _ in conns:
+                conn.close()
+
+
+class _PooledResponse(object):
+    """ File-like wrapper of httplib.HTTPResponse that returns the connection to the pool at end of body. """
+
+    def __init__(self, response, on_done):
+        self._response = response
+        self._on_done = on_done
+        self._buffer = ''
+
+    def _check_done(self):
+        if self._on_done is not None and self._response.isclosed():
+            on_done, self._on_done = self._on_done, None
+            on_done(True)
+
+    def read(self, amt=None):
+        if amt is None:
+            data = self._buffer + self._response.read()
+            self._buffer = ''
+        elif len(self._buffer) >= amt:
+            data, self._buffer = self._buffer[:amt], self._buffer[amt:]
+        else:
+            data = self._buffer + self._response.read(amt - len(self._buffer))
+            self._buffer = ''
+        self._check_done()
+        return data
+
+    def readline(self, limit=-1):
+        while '\n' not in self._buffer and (limit < 0 or len(self._buffer) < limit):
+            chunk = self._response.read(8192)
+            if not chunk:
+                break
+            self._buffer += chunk
+        self._check_done()
+        end = self._buffer.find('\n') + 1
+        if end <= 0:
+            end = len(self._buffer)
+        if 0 <= limit < end:
+            end = limit
+        line, self._buffer = self._buffer[:end], self._buffer[end:]
+        return line
+
+    def readlines(self, sizehint=0):
+        return list(iter(self.readline, ''))
+
+    def __iter__(self):
+        return iter(self.readline, '')
+
+    def fileno(self):
+        return self._response.fileno()
+
+    def close(self):
+        if self._on_done is not None:
+            if not self._response.isclosed() and self._response.length == 0:
+                # Nothing left to read (e.g. 304 Not Modified). Mark the body done to keep the connection.
+                self._response.read()
+            on_done, self._on_done = self._on_done, None
+            # A partially read body leaves the connection in an unknown state. Never reuse it.
+            on_done(self._response.isclosed())
+        self._response.close()
+
+
+class KeepAliveHandler(urllib2.HTTPHandler, urllib2.HTTPSHandler):
+    """ urllib2 handler serving HTTP and HTTPS requests with connections from a ConnectionPool.
+
+    It replaces the default HTTPHandler/HTTPSHandler (which always sends "Connection: close") in an opener. Proxy
+    tunneling is not supported.
+
+    A request failing on a reused connection is retried once with a new connection, unless it was written completely
+    and its method is not idempotent (e.g. POST), as the server may have applied it already.
+    """
+
+    idempotent_methods = frozenset(['GET', 'HEAD', 'PUT', 'DELETE', 'OPTIONS'])
+
+    def __init__(self, pool=None, context=None, debuglevel=0):
+        """ Constructor
+
+        Args:
+            pool (object): The ConnectionPool instance. A new one with default settings is created if omitted.
+            context (object): The ssl.SSLContext for HTTPS connections.
+            debuglevel (int): httplib debug level.
+        """
+        urllib2.HTTPHandler.__init__(self, debuglevel)
+        self._pool = pool if pool is not None else ConnectionPool()
+        self._context = context
+
+    @property
+    def pool(self):
+        """ Get the connection pool """
+        return self._pool
+
+    def http_open(self, req):
+        return self._pooled_open(httplib.HTTPConnection, req)
+
+    def https_open(self, req):
+        return self._pooled_open(httplib.HTTPSConnection, req, context=self._context)
+
+    def _pooled_open(self, http_class, req, **http_conn_args):
+        host = req.get_host()
+        if not host:
+            raise urllib2.URLError('no host given')
+
+        headers = dict(req.unredirected_hdrs)
+        headers.update(dict((k, v) for k, v in req.headers.items() if k not in headers))
+        headers['Connection'] = 'keep-alive'
+        headers = dict((name.title(), val) for name, val in headers.items())
+
+        key = (req.get_type(), host, self._context)
+
+        def factory():
+            h = http_class(host, timeout=req.timeout, **http_conn_args)
+            h.set_debuglevel(self._debuglevel)
+            return h
+
+        conn, reused = self._pool.acquire(key, factory)
+        sent = []
+        try:
+            r = self._send(conn, req, headers, sent)
+        except (socket.error, httplib.HTTPException) as err:
+            self._pool.discard(conn)
+            if not reused or isinstance(err, socket.timeout):
+                raise urllib2.URLError(err)
+            if sent and req.get_method() not in self.idempotent_methods:
+                # The request was written. The server may have applied it before dropping the connection.
+                raise urllib2.URLError(err)
+            # The server may drop an idle keep-alive connection at any time. Retry once with a fresh one.
+            get_logger().debug('Pooled connection to %s dropped (%s). Retry with a new connection.', host, err)
+            conn = self._pool.create(factory)
+            try:
+                r = self._send(conn, req, headers, rewind=True)
+            except (socket.error, httplib.HTTPException) as err:
+                self._pool.discard(conn)
+                raise urllib2.URLError(err)
+
+        def on_done(reusable):
+            if reusable and not r.will_close:
+                self._pool.release(key, conn)
+            else:
+                self._pool.discard(conn)
+
+        fp = _PooledResponse(r, on_done)
+        resp = urllib.addinfourl(fp, r.msg, req.get_full_url())
+        resp.code = r.status
+        resp.msg = r.reason
+        return resp
+
+    @staticmethod
+    def _send(conn, req, headers, sent=None, rewind=False):
+        data = req.get_data()
+        if rewind and hasattr(data, 'seek'):
+            # A streamed body was (partially) consumed by the failed attempt
+            data.seek(0)
+        conn.request(req.get_method(), req.get_selector(), data, headers)
+        if sent is not None:
+            sent.append(True)
+        return conn.getresponse(buffering=True)
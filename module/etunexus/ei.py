@@ -1,10 +1,13 @@
 # -*- coding: utf-8 -*-
 
+import copy
+import threading
 from datetime import date
 
-from baseapp import BaseApp
+from baseapp import BaseApp, AsyncApp
 from enum import *
 from emc import Group, DataSource, User
+from model import LazyModel
 
 
 class GeneUIInfo(dict):
@@ -264,6 +267,43 @@ class SnapshotInfo(dict):
         return cls(dict_obj.get('parent'), dict_obj.get('children'))
 
 
+class LazyBand(LazyModel, Band):
+    """ A Band hydrated lazily from trusted server data, refer to model.LazyModel.
+
+    "targetGene", "targetBand" and "snapshotInfo" are converted to BandGene, BandCombine and SnapshotInfo on first
+    access. It's a Band instance, so it can be passed to update_band(), etc. directly.
+    """
+
+    _lazy_fields = ('categoryId', 'name', 'description', 'needRefresh', 'type', 'targetGene', 'targetBand',
+                    'snapshotInfo', 'shared', 'id', 'amount', 'updateTime', 'owner')
+    _diff_keys = ('id', 'categoryId', 'type')
+    _lazy_nested = {
+        'targetGene': lambda obj, v: BandGene.from_dict(v) if v is not None else None,
+        'targetBand': lambda obj, v: BandCombine.from_dict(copy.deepcopy(v)) if v is not None else None,
+        'snapshotInfo': lambda obj, v: SnapshotInfo.from_dict(copy.deepcopy(v)) if v is not None else SnapshotInfo()
+    }
+
+    @classmethod
+    def from_raw_with_ext_cat(cls, dict_obj, category):
+        assert dict_obj and category
+        obj = cls.from_raw(dict_obj)
+        dict.__setitem__(obj, 'categoryId', category['id'] if isinstance(category, BandCategory) else int(category))
+        return obj
+
+
+class LazyBandCategory(LazyModel, BandCategory):
+    """ A BandCategory hydrated lazily from trusted server data, refer to model.LazyModel.
+
+    "bands" is converted to a list of LazyBand instances on first access.
+    """
+
+    _lazy_fields = ('name', 'bands', 'id')
+    _lazy_nested = {
+        'bands': lambda obj, v: [LazyBand.from_raw_with_ext_cat(x, dict.__getitem__(obj, 'id')) for x in v]
+                                if v is not None else []
+    }
+
+
 class FixedGeneCategory(dict):
     """ Structure for fixed (external) gene categories
 
@@ -461,6 +501,343 @@ class UidBandList(dict):
         return cls(dict_obj['bandIdList'], dict_obj['bandNameList'])
 
 
+class EI3BandListener(object):
+    """ Base of the listeners of band and band category changes made through an EI3 instance.
+
+    Register a listener with EI3.add_band_listener(). The methods are called after the change succeeds on server, from
+    the thread making the call. An exception raised by a listener is logged and ignored.
+    """
+
+    def band_added(self, band):
+        """ A band is added (by add_band() or do_snapshot()).
+
+        Arguments:
+            band (obj): The Band instance returned by server.
+        """
+        pass
+
+    def band_updated(self, band):
+        """ A band is updated.
+
+        Arguments:
+            band (obj): The Band instance returned by server.
+        """
+        pass
+
+    def band_deleted(self, band_id):
+        """ A band is deleted.
+
+        Arguments:
+            band_id (int): The band id.
+        """
+        pass
+
+    def band_category_added(self, band_category):
+        """ A band category is added.
+
+        Arguments:
+            band_category (obj): The BandCategory instance returned by server.
+        """
+        pass
+
+    def band_category_updated(self, band_category):
+        """ A band category is updated.
+
+        Arguments:
+            band_category (obj): The BandCategory instance returned by server.
+        """
+        pass
+
+    def band_category_deleted(self, band_category_id):
+        """ A band category is deleted.
+
+        Arguments:
+            band_category_id (int): The band category id.
+        """
+        pass
+
+    def user_changed(self):
+        """ The user of the session is changed by do_su_login() or do_su_logout(). """
+        pass
+
+
+class EI3BandIndex(EI3BandListener):
+    """ In-memory index of band categories and bands, with lookup by id, name and category in O(1).
+
+    It also keeps the dependency edges of combined bands (BandType.COMBINE) to their input bands, so dependents() tells
+    which bands have to be deleted or updated first.
+
+    Use EI3.get_band_index() to load one registered as a band listener of the client, so it stays up to date as
+    add_band(), update_band(), del_band(), etc. go through the same client. The bands are of the user at load time, so
+    the index is cleared when the user is changed by su login/logout. Call load() to fill it again.
+
+    Bands are indexed by their name, category and inputs at the time they're loaded or returned by server. Changing a
+    Band instance locally doesn't move it in the index until it's updated through the client.
+
+    It is safe to share an index among threads.
+    """
+
+    def __init__(self, band_categories=None):
+        """ Constructor
+
+        Arguments:
+            band_categories (list): BandCategory instances (with bands) to load.
+        """
+        self._lock = threading.RLock()
+        self._categories = {}
+        self._category_names = {}
+        self._bands = {}
+        self._band_names = {}
+        self._category_bands = {}
+        # Input band id to the ids of the combined bands using it
+        self._dependents = {}
+        # Id to the keys indexed, as the instances may be changed by the caller afterwards
+        self._category_keys = {}
+        self._band_keys = {}
+        if band_categories:
+            self.load(band_categories)
+
+    def load(self, band_categories):
+        """ Load band categories and their bands. Categories and bands already in the index are replaced.
+
+        Arguments:
+            band_categories (list): A list of BandCategory instances.
+        """
+        with self._lock:
+            for band_category in band_categories:
+                self._put_category(band_category)
+                for band in band_category['bands']:
+                    self._put_band(band)
+
+    def clear(self):
+        """ Remove all categories and bands from the index """
+        with self._lock:
+            for index in (self._categories, self._category_names, self._bands, self._band_names, self._category_bands,
+                          self._dependents, self._category_keys, self._band_keys):
+                index.clear()
+
+    def __len__(self):
+        return len(self._bands)
+
+    def __contains__(self, band):
+        band_id = band['id'] if isinstance(band, Band) else band
+        return band_id in self._bands
+
+    @property
+    def bands(self):
+        """ Get a list of all bands """
+        with self._lock:
+            return self._bands.values()
+
+    @property
+    def band_categories(self):
+        """ Get a list of all band categories """
+        with self._lock:
+            return self._categories.values()
+
+    def get_band(self, band_id):
+        """ Get a band by id.
+
+        Arguments:
+            band_id (int): The band id.
+        Return:
+            The Band instance, or None if not found.
+        """
+        return self._bands.get(band_id)
+
+    def find_bands(self, name, band_category=None):
+        """ Find bands by name.
+
+        Arguments:
+            name (str): The band name.
+            band_category (obj or int): The BandCategory instance or a band category id to find in. All categories if
+                                        omitted.
+        Return:
+            A list of Band instances.
+        """
+        with self._lock:
+            bands = self._band_names.get(name, {}).values()
+        if band_category is not None:
+            category_id = self._category_id(band_category)
+            bands = [x for x in bands if x['categoryId'] == category_id]
+        return bands
+
+    def find_band(self, name, band_category=None):
+        """ Find the band by name.
+
+        Arguments:
+            name (str): The band name.
+            band_category (obj or int): The BandCategory instance or a band category id to find in. All categories if
+                                        omitted.
+        Return:
+            The Band instance, or None if not found.
+        """
+        bands = self.find_bands(name, band_category)
+        if len(bands) > 1:
+            raise Exception('Band name (%s) is ambiguous in %d bands' % (name, len(bands)))
+        return bands[0] if bands else None
+
+    def get_band_category(self, band_category_id):
+        """ Get a band category by id.
+
+        Arguments:
+            band_category_id (int): The band category id.
+        Return:
+            The BandCategory instance, or None if not found.
+        """
+        return self._categories.get(band_category_id)
+
+    def find_band_category(self, name):
+        """ Find the band category by name.
+
+        Arguments:
+            name (str): The band category name.
+        Return:
+            The BandCategory instance, or None if not found.
+        """
+        with self._lock:
+            categories = self._category_names.get(name, {}).values()
+        if len(categories) > 1:
+            raise Exception('Band category name (%s) is ambiguous in %d categories' % (name, len(categories)))
+        return categories[0] if categories else None
+
+    def get_category_bands(self, band_category):
+        """ Get the bands in a band category.
+
+        Arguments:
+            band_category (obj or int): The BandCategory instance or a band category id.
+        Return:
+            A list of Band instances. The "bands" of a loaded BandCategory instance is not kept up to date, but this is.
+        """
+        with self._lock:
+            return self._category_bands.get(self._category_id(band_category), {}).values()
+
+    def dependencies(self, band):
+        """ Get the input bands of a combined band.
+
+        Arguments:
+            band (obj or int): The Band instance or a band id.
+        Return:
+            A list of Band instances in the index, empty for a band not combined.
+        """
+        band_id = band['id'] if isinstance(band, Band) else band
+        with self._lock:
+            keys = self._band_keys.get(band_id)
+            if keys is None:
+                return []
+            return [self._bands[x] for x in keys[2] if x in self._bands]
+
+    def dependents(self, band, recursive=False):
+        """ Get the combined bands using a band as input.
+
+        Arguments:
+            band (obj or int): The Band instance or a band id.
+            recursive (bool): Include the bands using the dependents, and so on.
+        Return:
+            A list of Band instances. With recursive, a band comes after all bands it depends on in the list.
+        """
+        band_id = band['id'] if isinstance(band, Band) else band
+        with self._lock:
+            if not recursive:
+                return [self._bands[x] for x in self._dependents.get(band_id, ()) if x in self._bands]
+            # Depth-first post order, reversed to get the dependencies first
+            ordered, visited, stack = [], set([band_id]), [(band_id, iter(self._dependents.get(band_id, ())))]
+            while stack:
+                node, children = stack[-1]
+                child = next(children, None)
+                if child is None:
+                    stack.pop()
+                    if node != band_id:
+                        ordered.append(node)
+                elif child not in visited:
+                    visited.add(child)
+                    stack.append((child, iter(self._dependents.get(child, ()))))
+            return [self._bands[x] for x in reversed(ordered) if x in self._bands]
+
+    @staticmethod
+    def _category_id(band_category):
+        return band_category['id'] if isinstance(band_category, BandCategory) else int(band_category)
+
+    def _put_category(self, band_category):
+        category_id = band_category['id']
+        self._remove_category(category_id, False)
+        self._categories[category_id] = band_category
+        self._category_keys[category_id] = band_category['name']
+        self._category_names.setdefault(band_category['name'], {})[category_id] = band_category
+        self._category_bands.setdefault(category_id, {})
+
+    def _remove_category(self, band_category_id, with_bands):
+        if self._categories.pop(band_category_id, None) is None:
+            return
+        name = self._category_keys.pop(band_category_id)
+        names = self._category_names.get(name)
+        if names is not None:
+            names.pop(band_category_id, None)
+            if not names:
+                del self._category_names[name]
+        if with_bands:
+            for band_id in self._category_bands.pop(band_category_id, {}).keys():
+                self._remove_band(band_id)
+
+    def _put_band(self, band):
+        band_id = band['id']
+        self._remove_band(band_id)
+        name, category_id = band['name'], band['categoryId']
+        input_ids = tuple(band['targetBand']['bandIds']) \
+            if band['type'] == BandType.COMBINE and band.get('targetBand') else ()
+        self._bands[band_id] = band
+        self._band_keys[band_id] = (name, category_id, input_ids)
+        self._band_names.setdefault(name, {})[band_id] = band
+        self._category_bands.setdefault(category_id, {})[band_id] = band
+        for input_id in input_ids:
+            self._dependents.setdefault(input_id, set()).add(band_id)
+
+    def _remove_band(self, band_id):
+        if self._bands.pop(band_id, None) is None:
+            return
+        name, category_id, input_ids = self._band_keys.pop(band_id)
+        names = self._band_names.get(name)
+        if names is not None:
+            names.pop(band_id, None)
+            if not names:
+                del self._band_names[name]
+        self._category_bands.get(category_id, {}).pop(band_id, None)
+        for input_id in input_ids:
+            dependents = self._dependents.get(input_id)
+            if dependents is not None:
+                dependents.discard(band_id)
+                if not dependents:
+                    del self._dependents[input_id]
+
+    # EI3BandListener
+    def band_added(self, band):
+        with self._lock:
+            self._put_band(band)
+
+    def band_updated(self, band):
+        with self._lock:
+            self._put_band(band)
+
+    def band_deleted(self, band_id):
+        with self._lock:
+            self._remove_band(band_id)
+
+    def band_category_added(self, band_category):
+        with self._lock:
+            self._put_category(band_category)
+
+    def band_category_updated(self, band_category):
+        with self._lock:
+            self._put_category(band_category)
+
+    def band_category_deleted(self, band_category_id):
+        with self._lock:
+            self._remove_category(band_category_id, True)
+
+    def user_changed(self):
+        self.clear()
+
+
 class EI3(BaseApp):
     """ Encapsulate Etu Insight (v3) API """
 
@@ -469,6 +846,18 @@ class EI3(BaseApp):
     __API_BASE = '/EI/V3/service/v1'
     __SHIRO_CAS_BASE = '/EI/V3/shiro-cas'
 
+    # Response cache rules (see BaseApp.enable_cache())
+    # /sync makes EI sync the group from EMC. It must reach the server on every call.
+    _cache_exempt = BaseApp._cache_exempt | frozenset(['uidlist', 'suauth', 'sync'])
+    _cache_dependencies = {
+        'band': ['bandcategory', 'defaultbandcategory', 'sharingbandcategory', 'uidbandlist', 'summary'],
+        'snapshot': ['band', 'bandcategory', 'defaultbandcategory', 'sharingbandcategory', 'uidbandlist', 'summary'],
+        'bandcategory': ['defaultbandcategory', 'sharingbandcategory'],
+        'fixedgene': ['fixedgenecategory', 'genecategory']
+    }
+    # The su login/logout switches the user of the session
+    _cache_reset = frozenset(['suauth'])
+
     def __init__(self, cas, host=None, api_base=None, shiro_cas_base=None):
         """ Constructor of EI3 instance. """
 
@@ -477,10 +866,57 @@ class EI3(BaseApp):
                                   api_host=host if host else self.__HOST,
                                   api_base=api_base if api_base else self.__API_BASE,
                                   shiro_cas_base=shiro_cas_base if shiro_cas_base else self.__SHIRO_CAS_BASE)
+        self._band_listeners = []
 
     def _resolve_root_url(self, postfix):
         return 'https://{0}/{1}'.format(self._api_host, postfix)
 
+    # Band listeners
+    def add_band_listener(self, listener):
+        """ Register a listener of the band and band category changes made through this instance.
+
+        Arguments:
+            listener (obj): An EI3BandListener instance.
+        """
+        assert listener and isinstance(listener, EI3BandListener)
+        # Replace rather than modify the list, so a notification in flight keeps iterating the old one
+        self._band_listeners = self._band_listeners + [listener]
+
+    def remove_band_listener(self, listener):
+        """ Unregister a band listener.
+
+        Arguments:
+            listener (obj): The EI3BandListener instance registered.
+        """
+        self._band_listeners = [x for x in self._band_listeners if x is not listener]
+
+    def _notify_band_listeners(self, method, *args):
+        for listener in self._band_listeners:
+            try:
+                getattr(listener, method)(*args)
+            except Exception as e:
+                self._logger.error('Band listener %s.%s() failed: %s', listener.__class__.__name__, method, e)
+
+    def get_band_index(self, shared=False, group=None, data_source=None):
+        """ Load user's band categories and bands into an EI3BandIndex, registered as a band listener of this instance.
+
+        Arguments:
+            shared (bool): Load the shared band categories of the group as well.
+            group (obj or int): The group of the shared band categories, refer to get_shared_band_categories().
+            data_source (obj or int): Load the default band categories of the data source as well, refer to
+                                      get_default_bandcategories().
+        Return:
+            An EI3BandIndex instance. Use remove_band_listener() to stop updating it.
+        """
+        band_categories = self.get_band_categories()
+        if shared:
+            band_categories.extend(self.get_shared_band_categories(group))
+        if data_source is not None:
+            band_categories.extend(self.get_default_bandcategories(data_source))
+        index = EI3BandIndex(band_categories)
+        self.add_band_listener(index)
+        return index
+
     # User info
     def get_me(self):
         """ Get the special "me" user information.
@@ -523,15 +959,29 @@ class EI3(BaseApp):
         return [GeneCategory.from_dict(x) for x in res['data']]
 
     # Band category
-    def get_band_categories(self):
+    def get_band_categories(self, lazy=False):
         """ Get user's all band categories and detail bands.
 
         Arguments:
+            lazy (bool): Return LazyBandCategory instances, which convert the bands only on first access.
         Return:
             A list of BandCategory instances.
         """
         res = self.request_get('/bandcategory')
-        return [BandCategory.from_dict(x) for x in res['data']]
+        from_dict = LazyBandCategory.from_raw if lazy else BandCategory.from_dict
+        return [from_dict(x) for x in res['data']]
+
+    def iter_band_categories(self, lazy=False):
+        """ Iterate user's all band categories and detail bands, parsed incrementally as the response arrives.
+
+        Arguments:
+            lazy (bool): Yield LazyBandCategory instances, which convert the bands only on first access.
+        Return:
+            A generator of BandCategory instances.
+        """
+        from_dict = LazyBandCategory.from_raw if lazy else BandCategory.from_dict
+        for x in self.request_iter('/bandcategory', ['data']):
+            yield from_dict(x)
 
     def add_band_category(self, band_category):
         """ Add a new band category.
@@ -546,7 +996,9 @@ class EI3(BaseApp):
         """
         assert band_category and isinstance(band_category, BandCategory)
         res = self.request_post_form('/bandcategory', band_category.to_simple())
-        return BandCategory.from_dict(res['data'])
+        res_category = BandCategory.from_dict(res['data'])
+        self._notify_band_listeners('band_category_added', res_category)
+        return res_category
 
     def update_band_category(self, band_category):
         """ Update a band category.
@@ -563,7 +1015,9 @@ class EI3(BaseApp):
         band_category_id = band_category['id']
         assert band_category_id
         res = self.request_post_form('/bandcategory/{0}'.format(band_category_id), band_category.to_simple())
-        return BandCategory.from_dict(res['data'])
+        res_category = BandCategory.from_dict(res['data'])
+        self._notify_band_listeners('band_category_updated', res_category)
+        return res_category
 
     def del_band_category(self, band_category):
         """ Delete a band category.
@@ -583,14 +1037,16 @@ class EI3(BaseApp):
         # a simple dict
         res_id = res['data'][0]['id'] if isinstance(res['data'], list) else res['data']['id']
         assert res_id == band_category_id
+        self._notify_band_listeners('band_category_deleted', res_id)
         return res_id
 
-    def get_shared_band_categories(self, group=None):
+    def get_shared_band_categories(self, group=None, lazy=False):
         """ Get shared band categories and detail bands in the group.
 
         Arguments:
             group (obj or int): The emc.Group instance, or EIGroup instance, or a group id to get shared bands. If
                                 it is omitted (=None), current user gorup is used. 
+            lazy (bool): Return LazyBandCategory instances, which convert the bands only on first access.
         Return:
             A list of BandCategory instances.
         """
@@ -600,7 +1056,8 @@ class EI3(BaseApp):
             api = '/sharingbandcategory?groupId={0}'.format(group_id)
 
         res = self.request_get(api)
-        return [BandCategory.from_dict(x) for x in res['data']]
+        from_dict = LazyBandCategory.from_raw if lazy else BandCategory.from_dict
+        return [from_dict(x) for x in res['data']]
 
     # Band
     def add_band(self, band, file_path=None):
@@ -622,9 +1079,11 @@ class EI3(BaseApp):
             res = self.request_upload('/band', band, file_path)
         else:
             res = self.request_post_multipart('/band', band)
-        return Band.from_dict_with_ext_cat(res['data'], band_category_id)
+        res_band = Band.from_dict_with_ext_cat(res['data'], band_category_id)
+        self._notify_band_listeners('band_added', res_band)
+        return res_band
 
-    def update_band(self, band, file_path=None):
+    def update_band(self, band, file_path=None, changed_only=False):
         """ Update a band.
 
         It is not recommended to change the band type after added with this method, but not enforced. Therefore, it is
@@ -636,6 +1095,8 @@ class EI3(BaseApp):
         Arguments:
             band (obj): The Band instance to add.
             file_path (str): The file to upload if the band type is BandType.UPLOAD.
+            changed_only (bool): Send only the "id", "categoryId", "type" and the changed fields of a LazyBand (see
+                                 LazyModel.diff()). Use it only if the server accepts a partial update.
         Return:
             A Band instance as the updated one.
         """
@@ -643,12 +1104,16 @@ class EI3(BaseApp):
         band_category_id = band['categoryId']
         band_id = band['id']
         assert band_id
+        if changed_only and isinstance(band, LazyModel):
+            band = band.diff()
         if file_path:
             assert band['type'] == BandType.UPLOAD
             res = self.request_upload('/band/{0}'.format(band_id), band, file_path)
         else:
             res = self.request_post_multipart('/band/{0}'.format(band_id), band)
-        return Band.from_dict_with_ext_cat(res['data'], band_category_id)
+        res_band = Band.from_dict_with_ext_cat(res['data'], band_category_id)
+        self._notify_band_listeners('band_updated', res_band)
+        return res_band
 
     def del_band(self, band):
         """ Delete a band.
@@ -664,17 +1129,73 @@ class EI3(BaseApp):
         res = self.request_del('/band/{0}'.format(band_id))
         res_id = res['data']['id']
         assert res_id == band_id
+        self._notify_band_listeners('band_deleted', res_id)
         return res_id
 
-    def get_uid_list(self, band, save_path):
+    def del_bands(self, bands, max_in_flight=None):
+        """ Delete bands concurrently.
+
+        Arguments:
+            bands (list): A list of Band instances or band ids to delete.
+            max_in_flight (int): Max concurrent delete requests. The "max_in_flight" of the instance is used if omitted.
+        Return:
+            A list of BatchResult instances in the same order as bands, with the band id deleted as result.
+        """
+        assert bands is not None and isinstance(bands, list)
+        return self.batch(self.del_band, bands, max_in_flight)
+
+    def get_uid_list(self, band, save_path, checksum=None, checksum_algorithm='md5', progress=None):
         """ Get/download user/customer id list in a band.
-        
+
+        The list is streamed to disk, and resumed if the connection drops.
+
         Arguments:
             band (obj or int): The Band instance or a band id to get the user list.
             save_path (str): The file path to save the user list.
+            checksum (str): The expected hex digest of the list file. Not checked if omitted.
+            checksum_algorithm (str): The hashlib algorithm name of the checksum.
+            progress (callable): Called as progress(bytes_done, total_bytes, bytes_per_second) during download.
         Return:
             The save_path in argument.
         """
+        download_url = self._get_uid_list_url(band)
+        return self.request_download(download_url, save_path, checksum=checksum, checksum_algorithm=checksum_algorithm,
+                                     progress=progress)
+
+    def iter_uids(self, band, batch_size=None):
+        """ Iterate user/customer ids in a band, streamed from the server without saving to disk.
+
+        The ids are yielded as soon as they arrive, and memory use does not grow with the band size. Stop iterating
+        (or close the generator) early to drop the rest of the download.
+
+        Arguments:
+            band (obj or int): The Band instance or a band id to get the user list.
+            batch_size (int): Yield lists of up to batch_size ids instead of single ids, if given.
+        Return:
+            A generator of uid (str), or of uid lists if batch_size is given.
+        """
+        assert batch_size is None or batch_size > 0
+        download_url = self._get_uid_list_url(band)
+        res = self.request_stream(download_url)
+        try:
+            batch = []
+            for line in res:
+                uid = line.strip()
+                if not uid:
+                    continue
+                if not batch_size:
+                    yield uid
+                    continue
+                batch.append(uid)
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+        finally:
+            res.close()
+
+    def _get_uid_list_url(self, band):
         assert band
         band_id = band['id'] if isinstance(band, Band) else int(band)
         assert band_id
@@ -683,7 +1204,7 @@ class EI3(BaseApp):
         self.logger.debug('Get the download link: %s' % download_link)
         download_url = self._resolve_root_url(download_link)
         self.logger.debug('Make download from: %s' % download_url)
-        return self.request_download(download_url, save_path)
+        return download_url
 
     # Snapshot
     def do_snapshot(self, band):
@@ -698,7 +1219,9 @@ class EI3(BaseApp):
         band_id = band['id'] if isinstance(band, Band) else int(band)
         assert band_id
         res = self.request_post('/band/{0}/snapshot'.format(band_id))
-        return Band.from_dict(res['data'])
+        res_band = Band.from_dict(res['data'])
+        self._notify_band_listeners('band_added', res_band)
+        return res_band
 
     # Fixed (external) gene
     def get_fixed_gene_categories(self):
@@ -729,7 +1252,7 @@ class EI3(BaseApp):
         res = self.request_upload('/fixedgene/schema', {'groupId': group_id}, file_path)
         return FixedGeneCategory.from_dict(res['data'])
 
-    def upload_fixed_gene_data(self, group, file_path):
+    def upload_fixed_gene_data(self, group, file_path, compress=False):
         """ Upload fixed (external) gene data (admin/operator only).
 
         It requires a gene data/value file, and the file format is standard CSV. A "uid" column is required, and other
@@ -738,14 +1261,16 @@ class EI3(BaseApp):
 
         Arguments:
             group (obj or int): The emc.Group or EIGroup instance or a group id to upload fixed gene schema.
-            file_path (str): The data file.
+            file_path (str or obj): The data file path, or a file-like object or generator of the data. It is
+                                    streamed to the server.
+            compress (bool): Upload gzip compressed, or not. The server must accept compressed requests.
         Return:
             A success message.
         """
         assert group and file_path
         group_id = group['id'] if isinstance(group, Group) or isinstance(group, EIGroup) else int(group)
         assert group_id
-        res = self.request_upload('/fixedgene/data', {'groupId': group_id}, file_path)
+        res = self.request_upload('/fixedgene/data', {'groupId': group_id}, file_path, compress=compress)
         return res['data']
 
     # Population summary data
@@ -859,7 +1384,7 @@ class EI3(BaseApp):
         return UidBandList.from_dict(res['data'])
 
     # Item data source
-    def upload_item_data(self, group, file_path):
+    def upload_item_data(self, group, file_path, compress=False):
         """ Upload item information data.
 
         It requires a item information file as standard CSV format. Please refer to the product documents or consult
@@ -867,13 +1392,15 @@ class EI3(BaseApp):
 
         Arguments:
             group (obj or int): The emc.Group instance, or EIGroup instance, or a group id to add the data.
-            file_path (str): The data file.
+            file_path (str or obj): The data file path, or a file-like object or generator of the data. It is
+                                    streamed to the server.
+            compress (bool): Upload gzip compressed, or not. The server must accept compressed requests.
         Return:
             The total item info (pid count) uploaded.
         """
         assert group and file_path
         group_id = group['id'] if isinstance(group, Group) or isinstance(group, EIGroup) else int(group)
-        res = self.request_upload('/item', data={'groupId': group_id}, file=file_path)
+        res = self.request_upload('/item', data={'groupId': group_id}, file=file_path, compress=compress)
         return res['data']['pidNumber']
 
     # EC Application - Summary
@@ -910,6 +1437,7 @@ class EI3(BaseApp):
         group_name = group['name'] if isinstance(group, Group) or isinstance(group, EIGroup) else str(group)
         user_name = user['name'] if isinstance(user, User) or isinstance(user, EIUser) else str(user)
         res = self.request_get('/suauth?groupName={0}&userName={1}'.format(group_name, user_name))
+        self._notify_band_listeners('user_changed')
         return res['data']
 
     def do_su_logout(self):
@@ -920,6 +1448,7 @@ class EI3(BaseApp):
             A success message.
         """
         res = self.request_del('/suauth')
+        self._notify_band_listeners('user_changed')
         return res['data']
 
     def get_default_bandcategories(self, data_source):
@@ -933,4 +1462,10 @@ class EI3(BaseApp):
         assert data_source
         data_source_id = data_source['id'] if isinstance(data_source, DataSource) else int(data_source)
         res = self.request_get('/defaultbandcategory?cId={0}'.format(data_source_id))
-        return [BandCategory.from_dict(x) for x in res['data']]
\ No newline at end of file
+        return [BandCategory.from_dict(x) for x in res['data']]
+
+
+class AsyncEI3(AsyncApp):
+    """ Asynchronous edition of EI3. Every public method of EI3 returns a Future instance instead. """
+
+    _app_class = EI3
@@ -2,8 +2,14 @@
 
 import time
 import json
-
-from baseapp import BaseApp
+import socket
+import urllib2
+import httplib
+import collections
+
+from baseapp import BaseApp, AsyncApp
+from executor import Executor
+from model import CompactRecord, LazyModel
 from enum import *
 
 
@@ -157,6 +163,22 @@ class User(dict):
                    dict_obj.get('id'), dict_obj.get('createTime'), dict_obj.get('lastUpdateTime'))
 
 
+class CompactUser(CompactRecord):
+    """ Compact (slotted) record of a user, with the same fields as User. The roles are converted to UserRole
+    instances on first access.
+    """
+
+    __slots__ = ('name', 'displayName', 'password', 'department', 'mail', 'roles', 'id', 'createTime',
+                 'lastUpdateTime')
+
+    _fields = __slots__
+    _nested = {
+        'roles': lambda roles: [x if isinstance(x, UserRole) else UserRole.from_dict(x) for x in roles]
+    }
+    _defaults = {'department': '', 'mail': '', 'roles': []}
+    _model = User
+
+
 class EventCollector(dict):
     """ Structure of Event Collector data source content.
 
@@ -234,6 +256,30 @@ class DataSource(dict):
         return new_obj
 
 
+class LazyDataSource(LazyModel, DataSource):
+    """ A DataSource hydrated lazily from trusted server data, refer to model.LazyModel.
+
+    It's a DataSource instance, so it can be passed to update_data_source(), etc. directly.
+    """
+
+    _lazy_fields = ('name', 'displayName', 'appIds', 'contentType', 'id', 'groupId', 'type', 'eventCollector')
+    _lazy_nested = {
+        'appIds': lambda obj, v: list(v) if v is not None else None,
+        'eventCollector': lambda obj, v: EventCollector.from_dict(v) if v is not None else None
+    }
+
+    @classmethod
+    def from_raw(cls, dict_obj):
+        obj = super(LazyDataSource, cls).from_raw(dict_obj)
+        if dict.__getitem__(obj, 'type') != DataSourceType.EVENT_COLLECTOR:
+            # The type and content are kept only for the supported type, as DataSource does
+            for name in ('type', 'eventCollector'):
+                obj._pending.discard(name)
+                obj._raw_values.pop(name, None)
+                dict.__delitem__(obj, name)
+        return obj
+
+
 class ExporterExtraSchema(dict):
     """ Structure for Extra Schema in Exporter Setting.
 
@@ -372,6 +418,26 @@ class SystemInfo(dict):
         return cls(dict_obj['version'], dict_obj['build'], dict_obj['branch'])
 
 
+def parse_audit_msg(msg):
+    """ Parse the "msg" of an audit log event, in "[Method]xxx;[Arguments]yyy;" format.
+
+    Arguments:
+        msg (str): The msg field of an AuditLogEvent.
+    Return:
+        tuple: (method, arguments), or (None, None) if msg is not in the format.
+    """
+    method_tag, arguments_tag = '[Method]', ';[Arguments]'
+    if not msg or not msg.startswith(method_tag):
+        return None, None
+    split = msg.find(arguments_tag, len(method_tag))
+    if split < 0:
+        return None, None
+    arguments = msg[split + len(arguments_tag):]
+    if arguments.endswith(';'):
+        arguments = arguments[:-1]
+    return msg[len(method_tag):split], arguments
+
+
 class AuditLogEvent(dict):
     """ Structure for an audit log event.
 
@@ -380,6 +446,8 @@ class AuditLogEvent(dict):
         userId (int): The user id of the event.
         groupUser (str): A human-readable string of the group/user of the event.
         msg (str): Detail information of the event. Basically in "[Method]xxx;[Arguments]yyy;" format
+
+    The "method" and "arguments" properties give the parsed msg. It is parsed on first access and cached.
     """
 
     def __init__(self, event_time, user_id, group_user, msg):
@@ -396,6 +464,44 @@ class AuditLogEvent(dict):
         assert dict_obj
         return cls(dict_obj['eventTime'], dict_obj['userId'], dict_obj['groupUser'], dict_obj['msg'])
 
+    def _parsed_msg(self):
+        msg = self['msg']
+        parsed = getattr(self, '_parsed', None)
+        if parsed is None or parsed[0] is not msg:
+            parsed = self._parsed = (msg,) + parse_audit_msg(msg)
+        return parsed
+
+    @property
+    def method(self):
+        """ Get the method parsed from msg, or None if msg is not in "[Method]xxx;[Arguments]yyy;" format """
+        return self._parsed_msg()[1]
+
+    @property
+    def arguments(self):
+        """ Get the arguments parsed from msg, or None if msg is not in "[Method]xxx;[Arguments]yyy;" format """
+        return self._parsed_msg()[2]
+
+
+class CompactAuditLogEvent(CompactRecord):
+    """ Compact (slotted) record of an audit log event, with the same fields and parsed msg properties as
+    AuditLogEvent.
+    """
+
+    __slots__ = ('eventTime', 'userId', 'groupUser', 'msg', '_parsed')
+
+    _fields = ('eventTime', 'userId', 'groupUser', 'msg')
+    _model = AuditLogEvent
+
+    @classmethod
+    def from_dict(cls, dict_obj):
+        obj = super(CompactAuditLogEvent, cls).from_dict(dict_obj)
+        obj._parsed = None
+        return obj
+
+    _parsed_msg = AuditLogEvent.__dict__['_parsed_msg']
+    method = AuditLogEvent.__dict__['method']
+    arguments = AuditLogEvent.__dict__['arguments']
+
 
 class AuditLog(dict):
     """ Structure for audit log.
@@ -499,18 +605,20 @@ class EMC2(BaseApp):
         res = self.request_get('/user/me')
         return User.from_dict(res)
 
-    def get_users(self, group):
+    def get_users(self, group, compact=False):
         """ Get user list in a group.
 
         Arguments:
             group (obj or int): The Group instance or group id to get user list.
+            compact (bool): Return CompactUser records instead, to save memory on large lists.
         Return:
-            A list of User instances.
+            A list of User (or CompactUser) instances.
         """
         assert group
         group_id = group['id'] if isinstance(group, Group) else int(group)
         res = self.request_get('/group/{0}/user'.format(group_id))
-        return [User.from_dict(x) for x in res]
+        model = CompactUser if compact else User
+        return [model.from_dict(x) for x in res]
 
     def add_user(self, group, user):
         """ Add a user into a group.
@@ -526,6 +634,19 @@ class EMC2(BaseApp):
         res = self.request_post('/group/{0}/user'.format(group_id), user)
         return User.from_dict(res)
 
+    def add_users(self, group, users, max_in_flight=None):
+        """ Add users into a group concurrently.
+
+        Arguments:
+            group (obj or int): The Group instance or group id to add the users into.
+            users (list): A list of User instances to add.
+            max_in_flight (int): Max concurrent add requests. The "max_in_flight" of the instance is used if omitted.
+        Return:
+            A list of BatchResult instances in the same order as users, with the added User instance as result.
+        """
+        assert group and users is not None and isinstance(users, list)
+        return self.batch(lambda user: self.add_user(group, user), users, max_in_flight)
+
     def update_user(self, user):
         """ Update an user.
 
@@ -627,18 +748,20 @@ class EMC2(BaseApp):
         return AppRole.from_dict(res)
 
     # Data source #
-    def get_data_sources(self, group):
+    def get_data_sources(self, group, lazy=False):
         """ Get data source list in a group.
 
         Arguments:
             group (obj or int): The Group instance or group id to get.
+            lazy (bool): Return LazyDataSource instances, which track the changes for update_data_source().
         Return:
             A list of DataSource instances.
         """
         assert group
         group_id = group['id'] if isinstance(group, Group) else int(group)
         res = self.request_get('/group/{0}/data-source'.format(group_id))
-        return [DataSource.from_dict(x) for x in res]
+        from_dict = LazyDataSource.from_raw if lazy else DataSource.from_dict
+        return [from_dict(x) for x in res]
 
     def add_data_source(self, group, data_source):
         """ Add a data source to a group.
@@ -657,17 +780,21 @@ class EMC2(BaseApp):
         res = self.request_post('/group/{0}/data-source'.format(group_id), data_source)
         return DataSource.from_dict(res)
 
-    def update_data_source(self, data_source):
+    def update_data_source(self, data_source, changed_only=False):
         """ Update a data source.
 
         Arguments:
             data_source (obj): The DataSource instance to update, with valid "id".
+            changed_only (bool): Send only the "id" and the changed fields of a LazyDataSource (see LazyModel.diff()).
+                                 Use it only if the server accepts a partial update.
         Return:
             A DataSource instance as the updated one.
         """
         assert data_source and isinstance(data_source, DataSource)
         source_id = data_source['id']
         assert source_id
+        if changed_only and isinstance(data_source, LazyModel):
+            data_source = data_source.diff()
         res = self.request_post('/data-source/{0}'.format(source_id), data_source)
         return DataSource.from_dict(res)
 
@@ -750,4 +877,107 @@ class EMC2(BaseApp):
     def get_audit_logs(self, start_time, end_time):
         assert start_time and end_time
         res = self.request_get('/audit?startTime={0}&endTime={1}'.format(start_time, end_time))
-        return AuditLog.from_dict(res)
\ No newline at end of file
+        return AuditLog.from_dict(res)
+
+    def iter_audit_events(self, start_time, end_time, compact=False):
+        """ Iterate audit log events in a time range, parsed incrementally as the response arrives.
+
+        Unlike get_audit_logs(), the whole response is never held in memory.
+
+        Arguments:
+            start_time (long): The start time in Epoch (milliseconds).
+            end_time (long): The end time in Epoch (milliseconds).
+            compact (bool): Yield CompactAuditLogEvent records instead, to save memory if kept in bulk.
+        Return:
+            A generator of AuditLogEvent (or CompactAuditLogEvent) instances.
+        """
+        assert start_time and end_time
+        model = CompactAuditLogEvent if compact else AuditLogEvent
+        for x in self.request_iter('/audit?startTime={0}&endTime={1}'.format(start_time, end_time), ['events']):
+            yield model.from_dict(x)
+
+    def iter_audit_logs(self, start_time, end_time, window=3600000, target_events=10000, min_window=60000,
+                        max_in_flight=1, resume_from=None, compact=False):
+        """ Iterate audit log events in a long time range, fetched window by window.
+
+        The range is split into sub-windows starting from "window" milliseconds. The next window is resized from the
+        event count of the last one toward "target_events", and a window failing by timeout or server error is split
+        into halves (down to "min_window") and fetched again. Only the events of the windows in flight are kept in
+        memory.
+
+        Windows are yielded in time order; the events in a window are in the order of the server. An event is yielded
+        only by the window it belongs to (start <= eventTime < end), so no event is repeated across windows.
+
+        Arguments:
+            start_time (long): The start time in Epoch (milliseconds), inclusive.
+            end_time (long): The end time in Epoch (milliseconds), exclusive.
+            window (long): The initial window size in milliseconds.
+            target_events (int): The preferred number of events per window.
+            min_window (long): The min window size in milliseconds.
+            max_in_flight (int): Windows to fetch in parallel ahead of the consumer. Default: 1 (no prefetch)
+            resume_from (long): Resume an interrupted iteration from this event time (e.g. the eventTime of the last
+                                event handled). Events at exactly this time are yielded again.
+            compact (bool): Yield CompactAuditLogEvent records instead.
+        Return:
+            A generator of AuditLogEvent (or CompactAuditLogEvent) instances.
+        """
+        assert start_time and end_time and window > 0 and target_events > 0 and min_window > 0
+        assert max_in_flight > 0
+        if resume_from is not None:
+            start_time = max(start_time, resume_from)
+        state = {'window': max(window, min_window)}
+
+        def next_window(begin):
+            return begin, min(begin + state['window'], end_time)
+
+        def adapt(begin, end, count):
+            # Grow at most 2x at a time; shrink down to the size expected to hold target_events
+            size = (end - begin) * target_events / max(count, 1)
+            state['window'] = max(min_window, min(size, state['window'] * 2))
+
+        if max_in_flight == 1:
+            begin = start_time
+            while begin < end_time:
+                begin, end = next_window(begin)
+                events = self._fetch_audit_window(begin, end, min_window, compact)
+                adapt(begin, end, len(events))
+                for event in events:
+                    yield event
+                begin = end
+            return
+
+        pending = collections.deque()
+        with Executor(max_in_flight) as executor:
+            begin = start_time
+            while begin < end_time or pending:
+                while begin < end_time and len(pending) < max_in_flight:
+                    begin, end = next_window(begin)
+                    pending.append((begin, end, executor.submit(self._fetch_audit_window, begin, end, min_window,
+                                                                   compact)))
+                    begin = end
+                window_begin, window_end, future = pending.popleft()
+                events = future.result()
+                adapt(window_begin, window_end, len(events))
+                for event in events:
+                    yield event
+
+    def _fetch_audit_window(self, begin, end, min_window, compact=False):
+        # Fetch the events in [begin, end). Split the window and retry if the server cannot make it.
+        try:
+            events = self.iter_audit_events(begin, end, compact)
+            return [x for x in events if begin <= x['eventTime'] < end]
+        except (urllib2.URLError, httplib.HTTPException, socket.error, ValueError) as e:
+            if isinstance(e, urllib2.HTTPError) and e.getcode() < 500:
+                raise
+            if end - begin <= min_window:
+                raise
+            middle = begin + (end - begin) // 2
+            self.logger.info('Fetch audit logs in [%d, %d) failed (%s). Split the window.', begin, end, e)
+            return self._fetch_audit_window(begin, middle, min_window, compact) + \
+                self._fetch_audit_window(middle, end, min_window, compact)
+
+
+class AsyncEMC2(AsyncApp):
+    """ Asynchronous edition of EMC2. Every public method of EMC2 returns a Future instance instead. """
+
+    _app_class = EMC2
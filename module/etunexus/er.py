@@ -1,7 +1,10 @@
 # -*- coding: utf-8 -*-
 
-from baseapp import BaseApp
+import copy
+
+from baseapp import BaseApp, AsyncApp
 from emc import Group, DataSource
+from model import LazyModel
 from enum import *
 
 
@@ -61,11 +64,50 @@ class ERDataSource(dict):
                    dict_obj.get('id'), dict_obj.get('groupId'))
 
 
+# Setting field converters, as fn(setting, name) giving the value of a setting field from the setting in wire format or
+# as passed to a constructor. Both the constructors and the builders of trusted server data convert with them.
+def _const_field(value):
+    return lambda setting, name: value
+
+
+def _optional_field(setting, name):
+    return setting.get(name)
+
+
+def _required_field(setting, name):
+    return setting[name]
+
+
+def _data_source_field(setting, name):
+    data_source = setting[name]
+    return {'id': data_source['id'], 'name': data_source['name']}
+
+
+def _bool_str_field(setting, name):
+    return str(bool(setting.get(name))).lower()
+
+
+def _delimiter_field(setting, name):
+    delimiter = setting.get(name)
+    return delimiter if delimiter is not None else ','
+
+
+def _convert_fields(fields, setting):
+    # fields None to take the setting as is
+    if fields is None:
+        return setting
+    return {name: convert(setting, name) for name, convert in fields}
+
+
 class AlgInstance(dict):
     """ Structure of an algorithm instance in the recommendation logic.
 
     AlgInstance is an ABC for all different algorithm structure. The inherited algorithm implementation should be named
-    as "Alg_[algId]", e.g. Alg_USER_BASED_CF or Alg_ALS.
+    as "Alg_[algId]", e.g. Alg_USER_BASED_CF or Alg_ALS. The algorithm classes are registered by the name at import.
+
+    An algorithm class also defines "_alg_id" and "_setting_fields" as the (setting name, converter) pairs its
+    constructor builds the setting with (see _const_field(), etc.). "_setting_fields" is None to take the setting as is.
+    The builders of trusted server data convert with the same pairs, just without the validation of the constructor.
 
     Fields:
         algId (str): The algorithm id, every derived algorithm should have its own id, refer to "LogicAlgorithmId" enum
@@ -78,6 +120,12 @@ class AlgInstance(dict):
         executeState (str): Last execution status, refer to "LogicExecuteState" enum for valid values.
         successTime (long): Last success execution time in Epoch (milliseconds).
     """
+
+    _alg_id = None
+    _setting_fields = None
+    # The optional fields set from the wire data after construction
+    _general_fields = ('qualifier', 'executeTime', 'executeState', 'successTime')
+
     def __init__(self, alg_id, weight, setting):
         assert alg_id and weight and setting and isinstance(setting, dict)
         super(AlgInstance, self).__init__({
@@ -87,29 +135,47 @@ class AlgInstance(dict):
         })
 
     def __init_general(self, dict_obj):
-        self.update({
-            'qualifier': dict_obj.get('qualifier'),
-            'executeTime': dict_obj.get('executeTime'),
-            'executeState': dict_obj.get('executeState'),
-            'successTime': dict_obj.get('successTime')
-        })
+        get = dict_obj.get
+        self.update({x: get(x) for x in self._general_fields})
 
     @classmethod
-    def from_dict(cls, dict_obj):
+    def _convert_setting(cls, setting):
+        return _convert_fields(cls._setting_fields, setting)
+
+    @classmethod
+    def from_dict(cls, dict_obj, trusted=False):
+        """ Create the algorithm instance of the algId.
+
+        Arguments:
+            dict_obj (dict): The algorithm instance in wire format.
+            trusted (bool): The dict_obj is decoded server data, so build the instance directly without validation.
+        Return:
+            An instance of the registered Alg_* class of the algId, or Alg_UNKNOWN for an unknown one.
+        """
         assert dict_obj
-        obj = cls._create_alg_instance(dict_obj['algId'], dict_obj)
-        if obj is not None:
-            obj.__init_general(dict_obj)
+        alg_id = dict_obj['algId']
+        if trusted:
+            return _alg_instance_builders.get(alg_id, _alg_instance_builders[LogicAlgorithmId.UNKNOWN])(dict_obj)
+        obj = _alg_instance_classes.get(alg_id, Alg_UNKNOWN).from_dict(dict_obj)
+        obj.__init_general(dict_obj)
         return obj
 
     @classmethod
-    def _create_alg_instance(cls, alg_id, dict_obj):
-        alg_class_name = 'Alg_{0}'.format(alg_id)
-        try:
-            klass = globals()[alg_class_name]
-        except KeyError, ke:
-            klass = None
-        return klass.from_dict(dict_obj) if klass else Alg_UNKNOWN.from_dict(dict_obj)
+    def _trusted_builder(cls):
+        # The function building an instance from trusted wire data, skipping the validation of the constructor
+        alg_id, fields, general_fields = cls._alg_id, cls._setting_fields, cls._general_fields
+        new, update = dict.__new__, dict.update
+
+        def build(dict_obj):
+            get = dict_obj.get
+            values = {x: get(x) for x in general_fields}
+            values['algId'] = alg_id
+            values['weight'] = dict_obj['weight']
+            values['setting'] = _convert_fields(fields, dict_obj['setting'])
+            obj = new(cls)
+            update(obj, values)
+            return obj
+        return build
 
 
 class Alg_UNKNOWN(AlgInstance):
@@ -118,9 +184,11 @@ class Alg_UNKNOWN(AlgInstance):
     Fields:
         (As 'setting' in AlgInstance)
     """
+    _alg_id = LogicAlgorithmId.UNKNOWN
+
     def __init__(self, weight, setting):
         assert weight and setting and isinstance(setting, dict)
-        super(Alg_UNKNOWN, self).__init__(LogicAlgorithmId.UNKNOWN, weight, setting)
+        super(Alg_UNKNOWN, self).__init__(self._alg_id, weight, self._convert_setting(setting))
 
     @classmethod
     def from_dict(cls, dict_obj):
@@ -141,19 +209,28 @@ class Alg_USER_BASED_CF(AlgInstance):
         als_iteration (int): ALS iterations.
         als_rank (int): ALS training features.
     """
+    _alg_id = LogicAlgorithmId.USER_BASED_CF
+    _setting_fields = (
+        ('id', _const_field(LogicAlgorithmId.USER_BASED_CF)),
+        ('DATASOURCE', _data_source_field),
+        ('TIMERANGE', _required_field),
+        ('action', _required_field),
+        ('als_iteration', _optional_field),
+        ('als_rank', _optional_field)
+    )
+
     def __init__(self, weight, data_source, time_range, actions, als_iteration=10, als_rank=10):
         assert data_source and isinstance(data_source, dict)
         assert time_range
         assert actions and isinstance(actions, list)
-        setting = {
-            'id': LogicAlgorithmId.USER_BASED_CF,
-            'DATASOURCE': {'id': data_source['id'], 'name': data_source['name']},
+        setting = self._convert_setting({
+            'DATASOURCE': data_source,
             'TIMERANGE': time_range,
             'action': actions,
             'als_iteration': als_iteration,
             'als_rank': als_rank
-        }
-        super(Alg_USER_BASED_CF, self).__init__(LogicAlgorithmId.USER_BASED_CF, weight, setting)
+        })
+        super(Alg_USER_BASED_CF, self).__init__(self._alg_id, weight, setting)
 
     @classmethod
     def from_dict(cls, dict_obj):
@@ -175,19 +252,28 @@ class Alg_ITEM_BASED_CF(AlgInstance):
         als_iteration (int): ALS iterations.
         als_rank (int): ALS training features.
     """
+    _alg_id = LogicAlgorithmId.ITEM_BASED_CF
+    _setting_fields = (
+        ('id', _const_field(LogicAlgorithmId.ITEM_BASED_CF)),
+        ('DATASOURCE', _data_source_field),
+        ('TIMERANGE', _required_field),
+        ('action', _required_field),
+        ('als_iteration', _optional_field),
+        ('als_rank', _optional_field)
+    )
+
     def __init__(self, weight, data_source, time_range, actions, als_iteration=10, als_rank=10):
         assert data_source and isinstance(data_source, dict)
         assert time_range
         assert actions and isinstance(actions, list)
-        setting = {
-            'id': LogicAlgorithmId.ITEM_BASED_CF,
-            'DATASOURCE': {'id': data_source['id'], 'name': data_source['name']},
+        setting = self._convert_setting({
+            'DATASOURCE': data_source,
             'TIMERANGE': time_range,
             'action': actions,
             'als_iteration': als_iteration,
             'als_rank': als_rank
-        }
-        super(Alg_ITEM_BASED_CF, self).__init__(LogicAlgorithmId.ITEM_BASED_CF, weight, setting)
+        })
+        super(Alg_ITEM_BASED_CF, self).__init__(self._alg_id, weight, setting)
 
     @classmethod
     def from_dict(cls, dict_obj):
@@ -211,24 +297,31 @@ class Alg_RANKING(AlgInstance):
         delimiter (str): The delimiter in the category string for multiple levels categories.
         flatAct (bool): Make the category as hierarchy (false, default) or flat (true).
     """
+    _alg_id = LogicAlgorithmId.RANKING
+    _setting_fields = (
+        ('id', _const_field(LogicAlgorithmId.RANKING)),
+        ('DATASOURCE', _data_source_field),
+        ('TIMERANGE', _required_field),
+        ('actionList', _required_field),
+        ('addNonCategoryRec', _bool_str_field),
+        ('delimiter', _delimiter_field),
+        ('flatAct', _optional_field)
+    )
+
     def __init__(self, weight, data_source, time_range, actions, gen_non_category_rec=True, delimiter=None,
                  flat_cat=False):
         assert data_source and isinstance(data_source, dict)
         assert time_range
         assert actions and isinstance(actions, list)
-        if delimiter is None:
-            delimiter = ','
-
-        setting = {
-            'id': LogicAlgorithmId.RANKING,
-            'DATASOURCE': {'id': data_source['id'], 'name': data_source['name']},
+        setting = self._convert_setting({
+            'DATASOURCE': data_source,
             'TIMERANGE': time_range,
             'actionList': actions,
-            'addNonCategoryRec': str(bool(gen_non_category_rec)).lower(),
+            'addNonCategoryRec': gen_non_category_rec,
             'delimiter': delimiter,
             'flatAct': flat_cat
-        }
-        super(Alg_RANKING, self).__init__(LogicAlgorithmId.RANKING, weight, setting)
+        })
+        super(Alg_RANKING, self).__init__(self._alg_id, weight, setting)
 
     @classmethod
     def from_dict(cls, dict_obj):
@@ -254,26 +347,34 @@ class Alg_RANKING_ITEMINFO(AlgInstance):
         delimiter (str): The delimiter in the category string for multiple levels categories.
         flatAct (bool): Make the category as hierarchy (false, default) or flat (true).
     """
+    _alg_id = LogicAlgorithmId.RANKING_ITEMINFO
+    _setting_fields = (
+        ('id', _const_field(LogicAlgorithmId.RANKING)),
+        ('DATASOURCE', _data_source_field),
+        ('TIMERANGE', _required_field),
+        ('actionList', _required_field),
+        ('datasource_Iteminfo', _data_source_field),
+        ('addNonCategoryRec', _bool_str_field),
+        ('delimiter', _delimiter_field),
+        ('flatAct', _optional_field)
+    )
+
     def __init__(self, weight, data_source, time_range, actions, item_data_source,
                  gen_non_category_rec=True, delimiter=None, flat_cat=False):
         assert data_source and isinstance(data_source, dict)
         assert time_range
         assert actions and isinstance(actions, list)
         assert item_data_source and isinstance(item_data_source, dict)
-        if delimiter is None:
-            delimiter = ','
-
-        setting = {
-            'id': LogicAlgorithmId.RANKING,
-            'DATASOURCE': {'id': data_source['id'], 'name': data_source['name']},
+        setting = self._convert_setting({
+            'DATASOURCE': data_source,
             'TIMERANGE': time_range,
             'actionList': actions,
-            'datasource_Iteminfo': {'id': item_data_source['id'], 'name': item_data_source['name']},
-            'addNonCategoryRec': str(bool(gen_non_category_rec)).lower(),
+            'datasource_Iteminfo': item_data_source,
+            'addNonCategoryRec': gen_non_category_rec,
             'delimiter': delimiter,
             'flatAct': flat_cat
-        }
-        super(Alg_RANKING_ITEMINFO, self).__init__(LogicAlgorithmId.RANKING_ITEMINFO, weight, setting)
+        })
+        super(Alg_RANKING_ITEMINFO, self).__init__(self._alg_id, weight, setting)
 
     @classmethod
     def from_dict(cls, dict_obj):
@@ -295,19 +396,27 @@ class Alg_SEARCH2CLICK(AlgInstance):
         TIME_DECAYED (int): The time decay factor.
         ACTION (str): The event action to calculate after the search event.
     """
+    _alg_id = LogicAlgorithmId.SEARCH2CLICK
+    _setting_fields = (
+        ('id', _const_field(LogicAlgorithmId.SEARCH2CLICK)),
+        ('DATASOURCE', _data_source_field),
+        ('TIMERANGE', _required_field),
+        ('TIME_DECAYED', _required_field),
+        ('ACTION', _required_field)
+    )
+
     def __init__(self, weight, data_source, time_range, time_decay_factor, action):
         assert data_source and isinstance(data_source, dict)
         assert time_range
         assert time_decay_factor
         assert action
-        setting = {
-            'id': LogicAlgorithmId.SEARCH2CLICK,
-            'DATASOURCE': {'id': data_source['id'], 'name': data_source['name']},
+        setting = self._convert_setting({
+            'DATASOURCE': data_source,
             'TIMERANGE': time_range,
             'TIME_DECAYED': time_decay_factor,
             'ACTION': action
-        }
-        super(Alg_SEARCH2CLICK, self).__init__(LogicAlgorithmId.SEARCH2CLICK, weight, setting)
+        })
+        super(Alg_SEARCH2CLICK, self).__init__(self._alg_id, weight, setting)
 
     @classmethod
     def from_dict(cls, dict_obj):
@@ -328,15 +437,21 @@ class Alg_Info_Integrity(AlgInstance):
 
     Notice: "attritubeList" is the typo of "attributeList".
     """
+    _alg_id = LogicAlgorithmId.INFO_INTEGRITY
+    _setting_fields = (
+        ('id', _const_field(LogicAlgorithmId.INFO_INTEGRITY)),
+        ('dataSource', _data_source_field),
+        ('attritubeList', _required_field)
+    )
+
     def __init__(self, weight, data_source, attributes):
         assert data_source and isinstance(data_source, dict)
         assert attributes and isinstance(attributes, list)
-        setting = {
-            'id': LogicAlgorithmId.INFO_INTEGRITY,
-            'dataSource': {'id': data_source['id'], 'name': data_source['name']},
+        setting = self._convert_setting({
+            'dataSource': data_source,
             'attritubeList': attributes
-        }
-        super(Alg_Info_Integrity, self).__init__(LogicAlgorithmId.INFO_INTEGRITY, weight, setting)
+        })
+        super(Alg_Info_Integrity, self).__init__(self._alg_id, weight, setting)
 
     @classmethod
     def from_dict(cls, dict_obj):
@@ -355,17 +470,24 @@ class Alg_ALS(AlgInstance):
         timeRange (int): The data time range to calculate.
         LAMBDA (float): The lambda value for ALS algorithm.
     """
+    _alg_id = LogicAlgorithmId.ALS
+    _setting_fields = (
+        ('id', _const_field(LogicAlgorithmId.ALS)),
+        ('dataSource', _data_source_field),
+        ('timeRange', _required_field),
+        ('LAMBDA', _required_field)
+    )
+
     def __init__(self, weight, data_source, time_range, lambda_val=0.1):
         assert data_source and isinstance(data_source, dict)
         assert time_range
         assert lambda_val
-        setting = {
-            'id': LogicAlgorithmId.ALS,
-            'dataSource': {'id': data_source['id'], 'name': data_source['name']},
+        setting = self._convert_setting({
+            'dataSource': data_source,
             'timeRange': time_range,
             'LAMBDA': lambda_val
-        }
-        super(Alg_ALS, self).__init__(LogicAlgorithmId.ALS, weight, setting)
+        })
+        super(Alg_ALS, self).__init__(self._alg_id, weight, setting)
 
     @classmethod
     def from_dict(cls, dict_obj):
@@ -382,13 +504,18 @@ class Alg_LDA(AlgInstance):
         id: Fixed "LDA"
         DATASOURCE (obj): An emc.DataSource instance, ERDataSource instance, or a dict instance with "id" and "name").
     """
+    _alg_id = LogicAlgorithmId.LDA
+    _setting_fields = (
+        ('id', _const_field(LogicAlgorithmId.LDA)),
+        ('DATASOURCE', _data_source_field)
+    )
+
     def __init__(self, weight, data_source):
         assert data_source and isinstance(data_source, dict)
-        setting = {
-            'id': LogicAlgorithmId.LDA,
-            'DATASOURCE': {'id': data_source['id'], 'name': data_source['name']}
-        }
-        super(Alg_LDA, self).__init__(LogicAlgorithmId.LDA, weight, setting)
+        setting = self._convert_setting({
+            'DATASOURCE': data_source
+        })
+        super(Alg_LDA, self).__init__(self._alg_id, weight, setting)
 
     @classmethod
     def from_dict(cls, dict_obj):
@@ -410,8 +537,18 @@ class AlgTraining(dict):
         id (int): The auto id.
         createTime (long): Create time in Epoch (milliseconds).
         updateTime (long): Update time in Epoch (milliseconds).
+
+    The training classes are named as "AlgTraining_[algId]" and registered by the name at import. As AlgInstance, a
+    training class defines "_alg_id" and "_setting_fields", and "_result_fields" as the fields kept from a non-empty
+    result ("_result_fields" None to take the result as is).
     """
 
+    _alg_id = None
+    _setting_fields = None
+    _result_fields = None
+    # The fields set from the wire data after construction
+    _general_fields = ('id', 'state', 'createTime', 'updateTime')
+
     def __init__(self, alg_id, setting):
         assert alg_id and setting and isinstance(setting, dict)
         super(AlgTraining, self).__init__({
@@ -420,32 +557,57 @@ class AlgTraining(dict):
         })
 
     def __init_result__(self, result):
-        self.update({'result': result})
+        self.update({'result': self._convert_result(result)})
 
     def __init_general__(self, dict_obj):
-        self.update({
-            'id': dict_obj['id'],
-            'state': dict_obj['state'],
-            'createTime': dict_obj['createTime'],
-            'updateTime': dict_obj['updateTime']
-        })
+        self.update({x: dict_obj[x] for x in self._general_fields})
 
     @classmethod
-    def from_dict(cls, dict_obj):
+    def _convert_setting(cls, setting):
+        return _convert_fields(cls._setting_fields, setting)
+
+    @classmethod
+    def _convert_result(cls, result):
+        if cls._result_fields is None or not result:
+            return result
+        return {x: result[x] for x in cls._result_fields}
+
+    @classmethod
+    def from_dict(cls, dict_obj, trusted=False):
+        """ Create the algorithm training instance of the algId.
+
+        Arguments:
+            dict_obj (dict): The algorithm training in wire format.
+            trusted (bool): The dict_obj is decoded server data, so build the instance directly without validation.
+        Return:
+            An instance of the registered AlgTraining_* class of the algId, or AlgTraining_UNKNOWN for an unknown one.
+        """
         assert dict_obj
-        obj = cls._create_algtraing_instance(dict_obj['algId'], dict_obj)
-        if obj is not None:
-            obj.__init_general__(dict_obj)
+        alg_id = dict_obj['algId']
+        if trusted:
+            return _alg_training_builders.get(alg_id, _alg_training_builders[LogicAlgorithmId.UNKNOWN])(dict_obj)
+        obj = _alg_training_classes.get(alg_id, AlgTraining_UNKNOWN).from_dict(dict_obj)
+        obj.__init_general__(dict_obj)
         return obj
 
     @classmethod
-    def _create_algtraing_instance(cls, alg_id, dict_obj):
-        alg_class_name = 'AlgTraining_{0}'.format(alg_id)
-        try:
-            klass = globals()[alg_class_name]
-        except KeyError, ke:
-            klass = None
-        return klass.from_dict(dict_obj) if klass else AlgTraining_UNKNOWN.from_dict(dict_obj)
+    def _trusted_builder(cls):
+        # The function building an instance from trusted wire data, skipping the validation of the constructor
+        alg_id, fields, general_fields, convert_result = (cls._alg_id, cls._setting_fields, cls._general_fields,
+                                                          cls._convert_result)
+        new, update = dict.__new__, dict.update
+
+        def build(dict_obj):
+            values = {x: dict_obj[x] for x in general_fields}
+            values['algId'] = alg_id
+            values['setting'] = _convert_fields(fields, dict_obj['setting'])
+            result = dict_obj.get('result')
+            if result is not None:
+                values['result'] = convert_result(result)
+            obj = new(cls)
+            update(obj, values)
+            return obj
+        return build
 
 
 class AlgTraining_UNKNOWN(AlgTraining):
@@ -455,9 +617,11 @@ class AlgTraining_UNKNOWN(AlgTraining):
         (As 'setting' in AlgTraining)
         (as 'result' in AlgTraining)
     """
+    _alg_id = LogicAlgorithmId.UNKNOWN
+
     def __init__(self, setting):
         assert setting and isinstance(setting, dict)
-        super(AlgTraining_UNKNOWN, self).__init__(LogicAlgorithmId.UNKNOWN, setting)
+        super(AlgTraining_UNKNOWN, self).__init__(self._alg_id, self._convert_setting(setting))
 
     def __init_result__(self, result):
         super(AlgTraining_UNKNOWN, self).__init_result__(result)
@@ -469,7 +633,7 @@ class AlgTraining_UNKNOWN(AlgTraining):
         obj = cls(setting)
         result = dict_obj.get('result')
         if result is not None:
-            obj.__init_result(result)
+            obj.__init_result__(result)
         return obj
 
 
@@ -485,24 +649,25 @@ class AlgTraining_LDA(AlgTraining):
         dataSource (str): Only the data source name.
         ldaModalPath (str): The path on HDFS keeps the training model.
     """
+    _alg_id = LogicAlgorithmId.LDA
+    _setting_fields = (
+        ('DATASOURCE', _data_source_field),
+        ('TOPICS', _required_field)
+    )
+    _result_fields = ('dataSource', 'ldaModalPath')
+
     def __init__(self, data_source, topics):
         assert data_source and isinstance(data_source, dict)
         assert topics and isinstance(topics, int)
-        setting = {
-            'DATASOURCE': {'id': data_source['id'], 'name': data_source['name']},
+        setting = self._convert_setting({
+            'DATASOURCE': data_source,
             'TOPICS': topics
-        }
-        super(AlgTraining_LDA, self).__init__(LogicAlgorithmId.LDA, setting)
+        })
+        super(AlgTraining_LDA, self).__init__(self._alg_id, setting)
 
     def __init_result__(self, result):
         assert result is not None and isinstance(result, dict)
-        final_result = {}
-        if len(result) > 0:
-            final_result = {
-                'dataSource': result['dataSource'],
-                'ldaModalPath': result['ldaModalPath']
-            }
-        super(AlgTraining_LDA, self).__init_result__(final_result)
+        super(AlgTraining_LDA, self).__init_result__(result)
 
     @classmethod
     def from_dict(cls, dict_obj):
@@ -515,6 +680,14 @@ class AlgTraining_LDA(AlgTraining):
         return obj
 
 
+# algId to the algorithm classes, registered by the class names once at import, and to their builders of trusted
+# server data
+_alg_instance_classes = dict([(x.__name__[len('Alg_'):], x) for x in AlgInstance.__subclasses__()])
+_alg_instance_builders = dict([(k, v._trusted_builder()) for k, v in _alg_instance_classes.iteritems()])
+_alg_training_classes = dict([(x.__name__[len('AlgTraining_'):], x) for x in AlgTraining.__subclasses__()])
+_alg_training_builders = dict([(k, v._trusted_builder()) for k, v in _alg_training_classes.iteritems()])
+
+
 class UserFilter(dict):
     """ Structure of a user filter setting.
 
@@ -621,7 +794,18 @@ class Logic(dict):
         })
 
     @classmethod
-    def from_dict(cls, dict_obj):
+    def from_dict(cls, dict_obj, trusted=False):
+        """ Create a Logic instance.
+
+        Arguments:
+            dict_obj (dict): The logic in wire format.
+            trusted (bool): The dict_obj is decoded server data, so build the instance (and the algorithm instances)
+                            directly without validation.
+        Return:
+            A Logic instance.
+        """
+        if trusted:
+            return cls._from_trusted(dict_obj)
         return cls(dict_obj['name'], dict_obj['displayName'], dict_obj['active'], dict_obj['numberOfRec'],
                    dict_obj['algType'], dict_obj['algInstances'],
                    dict_obj.get('userFilter'),
@@ -631,6 +815,57 @@ class Logic(dict):
                    dict_obj.get('id'), dict_obj.get('createTime'), dict_obj.get('updateTime'),
                    dict_obj.get('executeTime'), dict_obj.get('executeState'), dict_obj.get('successTime'))
 
+    @classmethod
+    def _from_trusted(cls, dict_obj):
+        get = dict_obj.get
+        user_filter = get('userFilter')
+        obj = dict.__new__(cls)
+        dict.update(obj, {
+            'name': dict_obj['name'],
+            'displayName': dict_obj['displayName'],
+            'active': dict_obj['active'],
+            'numberOfRec': dict_obj['numberOfRec'],
+            'algType': dict_obj['algType'],
+            'algInstances': [AlgInstance.from_dict(x, True) for x in dict_obj['algInstances']],
+            'userFilter': UserFilter.from_dict(user_filter) if user_filter is not None else None,
+            'useLocation': dict_obj['useLocation'],
+            'enableLastViewedItem': dict_obj['enableLastViewedItem'],
+            'delegateLogicName': get('delegateLogicName'),
+            'filteringLogicIds': get('filteringLogicIds') or [],
+            'enableUpdating': dict_obj['enableUpdating'],
+
+            'itemFilterSrc': get('itemFilterSrc'),
+            'enableSameCategory': dict_obj['enableSameCategory'],
+            'avlItemFilterMode': dict_obj['avlItemFilterMode'],
+
+            'id': get('id'),
+            'createTime': get('createTime'),
+            'updateTime': get('updateTime'),
+            'executeTime': get('executeTime'),
+            'executeState': get('executeState'),
+            'successTime': get('successTime')
+        })
+        return obj
+
+
+class LazyLogic(LazyModel, Logic):
+    """ A Logic hydrated lazily from trusted server data, refer to model.LazyModel.
+
+    "algInstances" and "userFilter" are converted to AlgInstance (Alg_*) and UserFilter instances on first access. It's
+    a Logic instance, so it can be passed to update_logic(), etc. directly.
+    """
+
+    _lazy_fields = ('name', 'displayName', 'active', 'numberOfRec', 'algType', 'algInstances', 'userFilter',
+                    'useLocation', 'enableLastViewedItem', 'delegateLogicName', 'filteringLogicIds', 'enableUpdating',
+                    'itemFilterSrc', 'enableSameCategory', 'avlItemFilterMode',
+                    'id', 'createTime', 'updateTime', 'executeTime', 'executeState', 'successTime')
+    _lazy_nested = {
+        'algInstances': lambda obj, v: [AlgInstance.from_dict(x, True) for x in copy.deepcopy(v)] if v is not None
+                                       else [],
+        'userFilter': lambda obj, v: UserFilter.from_dict(v) if v is not None else None,
+        'filteringLogicIds': lambda obj, v: list(v) if v is not None else []
+    }
+
 
 class Campaign(dict):
     """ Structure for a recommendation campaign
@@ -775,18 +1010,41 @@ class ER3(BaseApp):
         return [ERDataSource.from_dict(x) for x in res]
 
     # Logic #
-    def get_logics(self, group):
+    def get_logics(self, group, lazy=False, trusted=False):
         """ Get the recommendation logics in a group.
 
         Arguments:
             group (obj or int): The emc.Group instance, ERGroup instance, or group id to get.
+            lazy (bool): Return LazyLogic instances, which convert the algorithm instances only on first access.
+            trusted (bool): Build the Logic instances without validating the server data (see Logic.from_dict()).
         Return:
             A list of Logic instances.
         """
         assert group
         group_id = group['id'] if isinstance(group, Group) or isinstance(group, ERGroup) else int(group)
         res = self.request_get('/group/{0}/logic'.format(group_id))
-        return [Logic.from_dict(x) for x in res]
+        return [self._logic_from_dict(x, lazy, trusted) for x in res]
+
+    def iter_logics(self, group, lazy=False, trusted=False):
+        """ Iterate the recommendation logics in a group, parsed incrementally as the response arrives.
+
+        Arguments:
+            group (obj or int): The emc.Group instance, ERGroup instance, or group id to get.
+            lazy (bool): Yield LazyLogic instances, which convert the algorithm instances only on first access.
+            trusted (bool): Build the Logic instances without validating the server data (see Logic.from_dict()).
+        Return:
+            A generator of Logic instances.
+        """
+        assert group
+        group_id = group['id'] if isinstance(group, Group) or isinstance(group, ERGroup) else int(group)
+        for x in self.request_iter('/group/{0}/logic'.format(group_id)):
+            yield self._logic_from_dict(x, lazy, trusted)
+
+    @staticmethod
+    def _logic_from_dict(dict_obj, lazy, trusted):
+        if lazy:
+            return LazyLogic.from_raw(dict_obj)
+        return Logic.from_dict(dict_obj, trusted)
 
     def add_logic(self, group, logic):
         """ Add a new recommendation logic to a group.
@@ -802,20 +1060,36 @@ class ER3(BaseApp):
         res = self.request_post('/group/{0}/logic'.format(group_id), logic)
         return Logic.from_dict(res)
 
-    def update_logic(self, logic):
+    def update_logic(self, logic, changed_only=False):
         """ Update a recommendation logic.
 
         Arguments:
             logic (obj): The Logic instance to update, with a valid "id".
+            changed_only (bool): Send only the "id" and the changed fields of a LazyLogic (see LazyModel.diff()). Use it
+                                 only if the server accepts a partial update.
         Return:
             A Logic instance as the updated one.
         """
         assert logic and isinstance(logic, Logic)
         logic_id = logic['id']
         assert logic_id
+        if changed_only and isinstance(logic, LazyModel):
+            logic = logic.diff()
         res = self.request_post('/logic/{0}'.format(logic_id), logic)
         return Logic.from_dict(res)
 
+    def update_logics(self, logics, max_in_flight=None):
+        """ Update recommendation logics concurrently.
+
+        Arguments:
+            logics (list): A list of Logic instances to update, with valid "id".
+            max_in_flight (int): Max concurrent update requests. The "max_in_flight" of the instance is used if omitted.
+        Return:
+            A list of BatchResult instances in the same order as logics, with the updated Logic instance as result.
+        """
+        assert logics is not None and isinstance(logics, list)
+        return self.batch(self.update_logic, logics, max_in_flight)
+
     def del_logic(self, logic):
         """ Delete a recommendation logic.
 
@@ -984,18 +1258,19 @@ class ER3(BaseApp):
         res = self.request_post('/logic/{0}/layout'.format(logic_id), layout)
         return Layout.from_dict(res)
 
-    def get_alg_trainings(self, group):
+    def get_alg_trainings(self, group, trusted=False):
         """ Get algorithm training results in a group.
 
         Arguments:
             group (obj or int): The emc.Group instance, ERGroup instance, or group id to get.
+            trusted (bool): Build the instances without validating the server data (see AlgTraining.from_dict()).
         Return:
             A list of AlgTraing instances.
         """
         assert group
         group_id = group['id'] if isinstance(group, Group) or isinstance(group, ERGroup) else int(group)
         res = self.request_get('/group/{0}/algtraining'.format(group_id))
-        return [AlgTraining.from_dict(x) for x in res]
+        return [AlgTraining.from_dict(x, trusted) for x in res]
 
     def add_alg_training(self, group, alg_training):
         """ Submit a algorithm training.
@@ -1010,3 +1285,9 @@ class ER3(BaseApp):
         group_id = group['id'] if isinstance(group, Group) or isinstance(group, ERGroup) else int(group)
         res = self.request_post('/group/{0}/algtraining'.format(group_id), alg_training)
         return AlgTraining.from_dict(res)
+
+
+class AsyncER3(AsyncApp):
+    """ Asynchronous edition of ER3. Every public method of ER3 returns a Future instance instead. """
+
+    _app_class = ER3
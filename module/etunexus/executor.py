@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+
+import sys
+import Queue
+import threading
+
+from logger import get_logger
+
+
+class Future(object):
+    """ The pending result of a call submitted to an Executor. """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._done = False
+        self._result = None
+        self._exc_info = None
+        self._callbacks = []
+
+    def done(self):
+        """ Return True if the call has finished (successfully or not). """
+        with self._condition:
+            return self._done
+
+    def result(self, timeout=None):
+        """ Wait for and return the result of the call. The exception of the call is re-raised if it failed.
+
+        Args:
+            timeout (float): Seconds to wait. Wait forever if omitted.
+        Returns:
+            The return value of the call.
+        """
+        self._wait(timeout)
+        if self._exc_info:
+            raise self._exc_info[0], self._exc_info[1], self._exc_info[2]
+        return self._result
+
+    def exception(self, timeout=None):
+        """ Wait for the call and return the exception raised, or None if it succeeded. """
+        self._wait(timeout)
+        return self._exc_info[1] if self._exc_info else None
+
+    def add_done_callback(self, fn):
+        """ Call fn(future) when the call finishes. It is called immediately if the call is already done. """
+        with self._condition:
+            if not self._done:
+                self._callbacks.append(fn)
+                return
+        self._invoke_callback(fn)
+
+    def _wait(self, timeout):
+        with self._condition:
+            if timeout is None:
+                while not self._done:
+                    self._condition.wait()
+            elif not self._done:
+                self._condition.wait(timeout)
+            if not self._done:
+                raise RuntimeError('Timeout in waiting for the result.')
+
+    def _invoke_callback(self, fn):
+        try:
+            fn(self)
+        except Exception:
+            get_logger().exception('Exception in future callback.')
+
+    def _finish(self, result, exc_info):
+        with self._condition:
+            self._result = result
+            self._exc_info = exc_info
+            self._done = True
+            callbacks, self._callbacks = self._callbacks, []
+            self._condition.notify_all()
+        for fn in callbacks:
+            self._invoke_callback(fn)
+
+    def set_result(self, result):
+        self._finish(result, None)
+
+    def set_exc_info(self, exc_info):
+        self._finish(None, exc_info)
+
+
+class BatchResult(object):
+    """ The result of one item in a batch call.
+
+    Fields:
+        item (obj): The item given to the call.
+        result (obj): The return value of the call, or None if it failed.
+        error (obj): The exception raised by the call, or None if it succeeded.
+    """
+
+    def __init__(self, item, result=None, error=None):
+        self.item = item
+        self.result = result
+        self.error = error
+
+    @property
+    def ok(self):
+        """ The call succeeded or not """
+        return self.error is None
+
+    def __repr__(self):
+        return 'BatchResult(item=%r, result=%r, error=%r)' % (self.item, self.result, self.error)
+
+
+class Executor(object):
+    """ A bounded pool of worker threads running submitted calls.
+
+    Worker threads are started on demand up to "max_workers" and are daemon threads, so an executor never blocks the
+    process from exiting.
+    """
+
+    def __init__(self, max_workers=8):
+        """ Constructor
+
+        Args:
+            max_workers (int): Max calls running at the same time.
+        """
+        assert max_workers > 0
+        self._max_workers = max_workers
+        self._queue = Queue.Queue()
+        self._threads = []
+        self._shutdown = False
+        self._lock = threading.Lock()
+
+    @property
+    def max_workers(self):
+        """ Get max worker threads """
+        return self._max_workers
+
+    def submit(self, fn, *args, **kwargs):
+        """ Schedule fn(*args, **kwargs) to run in a worker thread.
+
+        Returns:
+            A Future instance of the call.
+        """
+        future = Future()
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError('Cannot submit calls after shutdown.')
+            self._queue.put((future, fn, args, kwargs))
+            if len(self._threads) < self._max_workers:
+                thread = threading.Thread(target=self._work)
+                thread.daemon = True
+                thread.start()
+                self._threads.append(thread)
+        return future
+
+    def map(self, fn, iterable):
+        """ Submit fn(item) for every item, and return the list of Future instances in the same order. """
+        return [self.submit(fn, x) for x in iterable]
+
+    def _work(self):
+        while True:
+            task = self._queue.get()
+            if task is None:
+                return
+            future, fn, args, kwargs = task
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException:
+                future.set_exc_info(sys.exc_info())
+            else:
+                future.set_result(result)
+            finally:
+                del task, future, fn, args, kwargs
+
+    def shutdown(self, wait=True):
+        """ Stop the workers after the calls already submitted are done.
+
+        Args:
+            wait (bool): Block until all workers exit or not.
+        """
+        with self._lock:
+            if self._shutdown:
+                return
+            self._shutdown = True
+            threads = list(self._threads)
+        for _ in threads:
+            self._queue.put(None)
+        if wait:
+            for thread in threads:
+                thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
+        return False
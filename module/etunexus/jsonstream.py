@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+
+import re
+
+from codec import get_default_codec
+
+
+class JSONArrayStream(object):
+    """ Incremental parser yielding the items of a JSON array in a streamed document one by one.
+
+    The array is located by a path of object keys from the document root, e.g. ['data'] for {"data": [...]}, or []
+    for a top-level array. Only the current item (plus one read chunk) is kept in memory. Values outside of the
+    path are parsed and dropped on the way.
+
+    The values are parsed with a JSONCodec: with its raw_decode() if it has one, or else with its loads() on the text
+    of each value, found with a light scan for the end of the value.
+    """
+
+    __chunk_size = 64 * 1024
+    __whitespace = ' \t\n\r'
+    __token_re = re.compile(r'["\[\]{}]')
+    __string_end_re = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*"', re.S)
+    __scalar_re = re.compile(r'[^,\]}:\s]*')
+
+    def __init__(self, fp, path=None, chunk_size=None, codec=None):
+        """ Constructor
+
+        Args:
+            fp (object): The file-like object of the JSON document, e.g. a response.
+            path (list): The object keys to the array. The root must be the array if omitted.
+            chunk_size (int): Bytes to read at a time.
+            codec (obj): The JSONCodec to parse values. The default codec if omitted.
+        """
+        self._fp = fp
+        self._path = list(path) if path else []
+        self._chunk_size = chunk_size if chunk_size else self.__chunk_size
+        codec = codec if codec is not None else get_default_codec()
+        self._loads = codec.loads
+        self._raw_decode = codec.raw_decode if codec.raw_decode is not None else self._scan_decode
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+
+    def _read_more(self):
+        if self._eof:
+            return False
+        chunk = self._fp.read(self._chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        if self._pos > len(self._buffer) // 2:
+            # Drop the consumed part so the buffer does not grow with the document
+            self._buffer = self._buffer[self._pos:]
+            self._pos = 0
+        self._buffer += chunk
+        return True
+
+    def _peek(self):
+        # Return the next non-whitespace char without consuming it, or '' at the end of document
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in self.__whitespace:
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._read_more():
+                return ''
+
+    def _expect(self, chars):
+        c = self._peek()
+        if not c or c not in chars:
+            raise ValueError('Expect one of "%s" at offset %d of JSON stream, got "%s"' % (chars, self._pos, c))
+        self._pos += 1
+        return c
+
+    def _value(self):
+        # Decode one complete value at the current position. A value at the end of buffer (e.g. a number) may be cut,
+        # so it counts only if followed by a structural char (",]}:") or the end of document.
+        self._peek()
+        while True:
+            try:
+                value, end = self._raw_decode(self._buffer, self._pos)
+            except ValueError:
+                if not self._read_more():
+                    raise
+                continue
+            rest = end
+            while rest < len(self._buffer) and self._buffer[rest] in self.__whitespace:
+                rest += 1
+            if (rest < len(self._buffer) and self._buffer[rest] in ',]}:') or not self._read_more():
+                self._pos = end
+                return value
+
+    def _scan_decode(self, s, idx):
+        # raw_decode() for a codec without one: find the end of the value at idx, and parse the value text with loads().
+        # A value cut at the end of s raises ValueError as raw_decode() does.
+        c = s[idx:idx + 1]
+        if c == '"':
+            end = self._string_end(s, idx + 1)
+        elif c and c in '[{':
+            depth, end = 0, idx
+            while True:
+                m = self.__token_re.search(s, end)
+                if not m:
+                    raise ValueError('Unterminated JSON value at offset %d' % idx)
+                end = m.end()
+                token = m.group()
+                if token == '"':
+                    end = self._string_end(s, end)
+                elif token in '[{':
+                    depth += 1
+                else:
+                    depth -= 1
+                    if depth == 0:
+                        break
+        else:
+            end = self.__scalar_re.match(s, idx).end()
+        return self._loads(s[idx:end]), end
+
+    def _string_end(self, s, idx):
+        # The end of a string starting at idx (after the opening quote)
+        m = self.__string_end_re.match(s, idx)
+        if not m:
+            raise ValueError('Unterminated JSON string at offset %d' % (idx - 1))
+        return m.end()
+
+    def _seek_array(self):
+        for key in self._path:
+            self._expect('{')
+            while True:
+                if self._peek() == '}':
+                    raise KeyError('Key "%s" not found in JSON stream' % key)
+                name = self._value()
+                self._expect(':')
+                if name == key:
+                    break
+                self._value()
+                if self._expect(',}') == '}':
+                    raise KeyError('Key "%s" not found in JSON stream' % key)
+        self._expect('[')
+
+    def __iter__(self):
+        self._seek_array()
+        if self._peek() == ']':
+            self._pos += 1
+            return
+        while True:
+            yield self._value()
+            if self._expect(',]') == ']':
+                return
+
+
+def iter_json_array(fp, path=None, chunk_size=None, codec=None):
+    """ Iterate the items of a JSON array in a streamed document. See JSONArrayStream.
+
+    Args:
+        fp (object): The file-like object of the JSON document.
+        path (list): The object keys to the array from the root.
+        chunk_size (int): Bytes to read at a time.
+        codec (obj): The JSONCodec to parse values. The default codec if omitted.
+    Returns:
+        A generator of the decoded items.
+    """
+    return iter(JSONArrayStream(fp, path, chunk_size, codec))
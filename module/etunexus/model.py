@@ -0,0 +1,357 @@
+# -*- coding: utf-8 -*-
+
+
+class CompactRecord(object):
+    """ Base of compact model records, an opt-in alternative to the dict based models for holding many objects.
+
+    A record keeps one slot per wire field (no per-instance dict), and converts nested fields to their model types
+    only on first access. It reads like the dict based model (record['name'], get(), keys(), items(), in), and
+    to_dict() gives the same wire format. Use to_model() to get the full model, e.g. to pass it to an update API.
+
+    Subclasses define:
+        _fields (tuple): The wire field names. They must also be listed in __slots__.
+        _nested (dict): Wire field name to the function converting the raw value on first access.
+        _defaults (dict): Wire field name to the value used for a missing/None field, as the dict based model does.
+        _model (class): The dict based model class.
+    """
+
+    __slots__ = ('_hydrated',)
+
+    _fields = ()
+    _nested = {}
+    _defaults = {}
+    _model = None
+
+    @classmethod
+    def from_dict(cls, dict_obj):
+        assert dict_obj
+        obj = cls.__new__(cls)
+        obj._hydrated = 0
+        for name in cls._fields:
+            value = dict_obj.get(name)
+            setattr(obj, name, cls._defaults.get(name) if value is None else value)
+        return obj
+
+    def __getitem__(self, key):
+        if key not in self._fields:
+            raise KeyError(key)
+        value = getattr(self, key)
+        if key in self._nested:
+            bit = 1 << self._fields.index(key)
+            if not self._hydrated & bit:
+                value = self._nested[key](value)
+                setattr(self, key, value)
+                self._hydrated |= bit
+        return value
+
+    def __setitem__(self, key, value):
+        if key not in self._fields:
+            raise KeyError(key)
+        setattr(self, key, value)
+        if key in self._nested:
+            # A value set by the caller is taken as converted
+            self._hydrated |= 1 << self._fields.index(key)
+
+    def get(self, key, default=None):
+        try:
+            value = self[key]
+        except KeyError:
+            return default
+        return value
+
+    def __contains__(self, key):
+        return key in self._fields
+
+    def __iter__(self):
+        return iter(self._fields)
+
+    def __len__(self):
+        return len(self._fields)
+
+    def keys(self):
+        return list(self._fields)
+
+    def items(self):
+        return [(x, self[x]) for x in self._fields]
+
+    def to_dict(self):
+        """ Get the record as a plain dict in the wire format. Nested fields not accessed yet are left raw. """
+        return dict([(x, getattr(self, x)) for x in self._fields])
+
+    def to_model(self):
+        """ Get the record as the full (dict based) model instance """
+        return self._model.from_dict(self.to_dict())
+
+    def __eq__(self, other):
+        if isinstance(other, CompactRecord):
+            other = other.to_model()
+        return self.to_model() == other
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return '%s(%r)' % (self.__class__.__name__, self.to_dict())
+
+
+class LazyModel(object):
+    """ Mixin of lazily hydrated dict based models, an opt-in for reading large trees of server data.
+
+    from_raw() wraps a decoded JSON object without walking it: plain fields are copied as is and nested fields are
+    kept raw until first accessed (obj[key], get(), pop(), setdefault()), then converted to their model types once and
+    stored. Bulk reads (items(), values(), iteritems(), copy(), ==, ...) hydrate every field first, so they see the same
+    values as the eager model. The raw values are validated by nothing, so use it only for trusted server data.
+
+    Note dict(obj) and the C JSON encoder read the dict storage directly, i.e. the raw wire values of the fields not
+    accessed yet, which is still the same wire format.
+
+    An instance from from_raw() also remembers the server state of its fields, so changed_fields() and diff() tell
+    what the caller changed (including changes inside nested fields), and encode_fields()/to_wire() reuse the
+    encodings of unchanged fields instead of encoding them again on every request.
+
+    Subclasses mix it in before the model class, e.g. "class LazyBand(LazyModel, Band)", and define:
+        _lazy_fields (tuple): The wire field names of the model. A field missing in the raw object is set to None.
+        _lazy_nested (dict): Wire field name to the function (obj, raw_value) converting the raw value. It's called at
+                             once for a None value, so it can give the default as the model does. The converted value
+                             must not share mutable parts with the raw value, which is kept to find changes.
+        _diff_keys (tuple): The fields always sent in a diff(), e.g. the id.
+    """
+
+    _lazy_fields = ()
+    _lazy_nested = {}
+    _diff_keys = ('id',)
+
+    # Names of the nested fields not converted yet. Also the default for instances created by the model constructor.
+    _pending = frozenset()
+    # Nested field name to its raw server value, kept once converted. None if the instance is not from server.
+    _raw_values = None
+    # Nested field name to the value converted again from the raw one, to compare with the current value
+    _clean_values = None
+    # Fields assigned by the caller since loaded from server
+    _dirty = frozenset()
+    # Encoding function to {field: encoded value} of the unchanged fields
+    _encoded = None
+
+    @classmethod
+    def from_raw(cls, dict_obj):
+        assert dict_obj
+        obj = dict.__new__(cls)
+        dict.update(obj, dict_obj)
+        fields = cls.__dict__.get('_lazy_field_set')
+        if fields is None:
+            fields = cls._lazy_field_set = frozenset(cls._lazy_fields)
+        if obj.viewkeys() != fields:
+            # Keep exactly the model fields, as the model constructor does
+            for name in obj.viewkeys() - fields:
+                dict.__delitem__(obj, name)
+            for name in fields - obj.viewkeys():
+                dict.__setitem__(obj, name, None)
+        pending = set()
+        raw_values = {}
+        for name, convert in cls._lazy_nested.iteritems():
+            if dict.__getitem__(obj, name) is None:
+                dict.__setitem__(obj, name, convert(obj, None))
+                raw_values[name] = None
+            else:
+                pending.add(name)
+        obj._pending = pending
+        obj._raw_values = raw_values
+        return obj
+
+    def _hydrate_field(self, key):
+        self._pending.discard(key)
+        raw = dict.__getitem__(self, key)
+        value = self._lazy_nested[key](self, raw)
+        dict.__setitem__(self, key, value)
+        if self._raw_values is not None:
+            self._raw_values[key] = raw
+        return value
+
+    def _set_dirty(self, keys):
+        if self._raw_values is None:
+            return
+        if not self._dirty:
+            self._dirty = set()
+        self._dirty.update(keys)
+
+    def hydrate(self):
+        """ Convert all nested fields not accessed yet.
+
+        Return:
+            The instance itself.
+        """
+        for key in list(self._pending):
+            self._hydrate_field(key)
+        return self
+
+    @property
+    def hydrated(self):
+        """ Get whether all nested fields are converted """
+        return not self._pending
+
+    def changed_fields(self):
+        """ Get the fields changed since loaded from server.
+
+        A field is changed if it's assigned, deleted, or it's a converted nested field no longer equal to the server
+        value. All fields are taken as changed for an instance not created by from_raw().
+
+        Return:
+            A set of field names.
+        """
+        if self._raw_values is None:
+            return set(self.keys())
+        changed = set(self._dirty)
+        if self._clean_values is None:
+            self._clean_values = {}
+        for key, raw in self._raw_values.iteritems():
+            if key in changed:
+                continue
+            if key not in self._clean_values:
+                self._clean_values[key] = self._lazy_nested[key](self, raw)
+            if key not in self or self._clean_values[key] != dict.__getitem__(self, key):
+                changed.add(key)
+        return changed
+
+    def diff(self, keys=None):
+        """ Get the changed fields and their values, to send as a partial update.
+
+        Arguments:
+            keys (list): The fields always included. "_diff_keys" of the class is used if omitted.
+        Return:
+            A dict of the changed fields, plus the fields in keys.
+        """
+        if keys is None:
+            keys = self._diff_keys
+        return dict([(k, self[k]) for k in self.changed_fields().union(keys) if k in self])
+
+    def encode_fields(self, encode):
+        """ Encode each field value, reusing the encodings of unchanged fields from previous calls.
+
+        Fields not accessed yet are encoded from their raw values without converting them.
+
+        Arguments:
+            encode (callable): The function to encode a (non-None) field value, e.g. json.dumps. It must be the same
+                               function object across calls to reuse the encodings.
+        Return:
+            A list of (name, encoded value) tuples, with None as the encoded value for a None field.
+        """
+        unchanged = None
+        if self._raw_values is not None:
+            unchanged = self.viewkeys() - self.changed_fields()
+            if self._encoded is None:
+                self._encoded = {}
+            encoded = self._encoded.setdefault(encode, {})
+        ret = []
+        for key, value in dict.iteritems(self):
+            if value is None:
+                ret.append((key, None))
+            elif unchanged is None:
+                ret.append((key, encode(value)))
+            elif key in unchanged:
+                if key not in encoded:
+                    encoded[key] = encode(value)
+                ret.append((key, encoded[key]))
+            else:
+                encoded.pop(key, None)
+                ret.append((key, encode(value)))
+        return ret
+
+    def to_wire(self, dumps):
+        """ Serialize the instance to a JSON object, reusing the encodings of unchanged fields.
+
+        Arguments:
+            dumps (callable): The JSON serialize function, e.g. JSONCodec.dumps.
+        Return:
+            str: The JSON string.
+        """
+        return '{%s}' % ', '.join(['%s: %s' % (dumps(k), 'null' if v is None else v)
+                                   for k, v in self.encode_fields(dumps)])
+
+    def __getitem__(self, key):
+        if key in self._pending:
+            return self._hydrate_field(key)
+        return dict.__getitem__(self, key)
+
+    def get(self, key, default=None):
+        if key in self._pending:
+            return self._hydrate_field(key)
+        return dict.get(self, key, default)
+
+    def __setitem__(self, key, value):
+        if key in self._pending:
+            self._pending.discard(key)
+        self._set_dirty((key,))
+        dict.__setitem__(self, key, value)
+
+    def __delitem__(self, key):
+        if key in self._pending:
+            self._pending.discard(key)
+        self._set_dirty((key,))
+        dict.__delitem__(self, key)
+
+    def pop(self, key, *args):
+        if key in self._pending:
+            self._hydrate_field(key)
+        if key in self:
+            self._set_dirty((key,))
+        return dict.pop(self, key, *args)
+
+    def setdefault(self, key, default=None):
+        if key in self._pending:
+            return self._hydrate_field(key)
+        if key not in self:
+            self._set_dirty((key,))
+        return dict.setdefault(self, key, default)
+
+    def update(self, *args, **kwargs):
+        other = dict(*args, **kwargs)
+        if self._pending:
+            self._pending.difference_update(other)
+        self._set_dirty(other)
+        dict.update(self, other)
+
+    def items(self):
+        return dict.items(self.hydrate())
+
+    def values(self):
+        return dict.values(self.hydrate())
+
+    def iteritems(self):
+        return dict.iteritems(self.hydrate())
+
+    def itervalues(self):
+        return dict.itervalues(self.hydrate())
+
+    def viewitems(self):
+        return dict.viewitems(self.hydrate())
+
+    def viewvalues(self):
+        return dict.viewvalues(self.hydrate())
+
+    def popitem(self):
+        item = dict.popitem(self.hydrate())
+        self._set_dirty((item[0],))
+        return item
+
+    def copy(self):
+        return dict(self.hydrate())
+
+    def clear(self):
+        self._set_dirty(self.keys())
+        self._pending = frozenset()
+        dict.clear(self)
+
+    def __eq__(self, other):
+        if isinstance(other, LazyModel):
+            other.hydrate()
+        return dict.__eq__(self.hydrate(), other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return dict.__repr__(self.hydrate())
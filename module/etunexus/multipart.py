@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+
+import os
+import types
+import uuid
+import tempfile
+import mimetypes
+
+
+def _utf8(s):
+    # Header parts are byte strings. Unicode names/values (e.g. paths from JSON configs) are sent as UTF-8.
+    return s.encode('utf-8') if isinstance(s, unicode) else s
+
+
+class MultipartEncoder(object):
+    """ Streaming multipart/form-data request body.
+
+    The body is a read-only file-like object producing the encoded form on the fly, so a file part is read from its
+    source chunk by chunk while the request is sent, and never held in memory as a whole. The total length is known
+    up front (for the Content-Length header), and the body can be rewound with seek(0) to send it again.
+
+    A file part can be a file path, a file-like object, or a generator/iterator of str chunks. A generator or a
+    non-seekable file-like object (e.g. a pipe) is spooled to a temporary file first, as its size must be known before
+    sending.
+    """
+
+    __chunk_size = 64 * 1024
+
+    def __init__(self, fields, files, boundary=None):
+        """ Constructor
+
+        Args:
+            fields (list): The (name, value) pairs of plain fields. A value must be a str or unicode (sent as UTF-8).
+            files (list): The (name, source, filename) tuples of file parts. The filename can be None to use the base
+                          name of the file path or object name.
+            boundary (str): The multipart boundary. A random one is generated if omitted.
+        """
+        self._boundary = _utf8(boundary) if boundary else uuid.uuid4().hex
+        self._owned = []
+        self._parts = []
+        self._position = 0
+
+        for name, value in fields:
+            self._parts.append('--%s\r\nContent-Disposition: form-data; name="%s"\r\n\r\n%s\r\n' %
+                               (self._boundary, _utf8(name), _utf8(value)))
+        for name, source, filename in files:
+            fd, size, filename = self._open_source(source, filename)
+            content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+            self._parts.append('--%s\r\nContent-Disposition: form-data; name="%s"; filename="%s"\r\n'
+                               'Content-Type: %s\r\n\r\n' %
+                               (self._boundary, _utf8(name), _utf8(filename), _utf8(content_type)))
+            self._parts.append((fd, fd.tell(), size))
+            self._parts.append('\r\n')
+        self._parts.append('--%s--\r\n\r\n' % self._boundary)
+
+        self._length = sum([x[2] if isinstance(x, tuple) else len(x) for x in self._parts])
+        self._index = 0
+        self._offset = 0
+
+    @property
+    def boundary(self):
+        """ Get the multipart boundary """
+        return self._boundary
+
+    @property
+    def content_type(self):
+        """ Get the Content-Type header value of the body """
+        return 'multipart/form-data; boundary=%s' % self._boundary
+
+    def __len__(self):
+        return self._length
+
+    def _open_source(self, source, filename):
+        if isinstance(source, basestring):
+            fd = open(source, 'rb')
+            self._owned.append(fd)
+            return fd, os.fstat(fd.fileno()).st_size, filename if filename else os.path.basename(source)
+
+        if hasattr(source, 'read'):
+            name = getattr(source, 'name', None)
+            filename = filename if filename else (os.path.basename(name) if isinstance(name, basestring) else 'file')
+            try:
+                start = source.tell()
+                source.seek(0, os.SEEK_END)
+                size = source.tell() - start
+                source.seek(start)
+                return source, size, filename
+            except (AttributeError, IOError, ValueError):
+                # Not seekable (e.g. a pipe, stdin or a response). Spool it to know its size and to rewind it.
+                fd, size = self._spool(iter(lambda: source.read(self.__chunk_size), ''))
+                return fd, size, filename
+
+        if isinstance(source, (types.GeneratorType, list, tuple)) or hasattr(source, 'next'):
+            fd, size = self._spool(source)
+            return fd, size, filename if filename else 'file'
+
+        raise TypeError('Unsupported file source: %r' % type(source))
+
+    def _spool(self, chunks):
+        fd = tempfile.TemporaryFile()
+        self._owned.append(fd)
+        for chunk in chunks:
+            fd.write(chunk)
+        size = fd.tell()
+        fd.seek(0)
+        return fd, size
+
+    def read(self, size=-1):
+        """ Read up to size bytes of the body (or all the rest if size < 0). """
+        out = []
+        remain = size if size >= 0 else self._length
+        while remain > 0 and self._index < len(self._parts):
+            part = self._parts[self._index]
+            if isinstance(part, tuple):
+                fd, start, part_size = part
+                data = fd.read(min(remain, part_size - self._offset, self.__chunk_size))
+                if not data and self._offset < part_size:
+                    raise IOError('File part is shorter than its size %d (changed while uploading?)' % part_size)
+            else:
+                data = part[self._offset:self._offset + remain]
+            self._offset += len(data)
+            remain -= len(data)
+            out.append(data)
+            if self._offset >= (part[2] if isinstance(part, tuple) else len(part)):
+                self._next_part()
+        data = ''.join(out)
+        self._position += len(data)
+        return data
+
+    def _next_part(self):
+        self._index += 1
+        self._offset = 0
+        if self._index < len(self._parts) and isinstance(self._parts[self._index], tuple):
+            fd, start, _ = self._parts[self._index]
+            fd.seek(start)
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        """ Rewind the body. Only seek(0) is supported. """
+        if offset != 0 or whence != os.SEEK_SET:
+            raise IOError('MultipartEncoder can only be rewound to the beginning.')
+        self._index = -1
+        self._next_part()
+        self._position = 0
+
+    def close(self):
+        """ Close the files opened by the encoder. """
+        for fd in self._owned:
+            fd.close()
+        self._owned = []
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+
+import ssl
+import urllib2
+import cookielib
+
+from . import API_USER_AGENT
+from logger import get_logger
+from connection import ConnectionPool, KeepAliveHandler
+from compression import GzipProcessor
+
+
+class Session(object):
+    """ An isolated HTTP session: its own cookie jar, TLS context, connection pool and urllib2 opener.
+
+    gzip/deflate encoded responses are decoded transparently by the opener.
+
+    Every CAS instance owns a Session, and the application instances (EMC2, ER3, EI3) bound to the CAS make requests
+    through it. Nothing is installed process-wide, so sessions of different groups/users can be used side by side in
+    one process.
+    """
+
+    def __init__(self, secure=True, connection_pool=None, debuglevel=0):
+        """ Constructor
+
+        Args:
+            secure (bool): Enable the certificate check or not
+            connection_pool (object): The ConnectionPool instance for keep-alive connections. A new one with default
+                                      settings is created if omitted.
+            debuglevel (int): httplib debug level
+        """
+        self._logger = get_logger()
+        self._cookie_jar = cookielib.CookieJar()
+        self._connection_pool = connection_pool if connection_pool is not None else ConnectionPool()
+
+        self._ssl_context = None
+        if not secure:
+            self._logger.info('[WARNING] Skip certificate verification.')
+            self._ssl_context = ssl.create_default_context()
+            self._ssl_context.check_hostname = False
+            self._ssl_context.verify_mode = ssl.CERT_NONE
+
+        no_proxy_support = urllib2.ProxyHandler({})
+        cookie_handler = urllib2.HTTPCookieProcessor(self._cookie_jar)
+        keep_alive_handler = KeepAliveHandler(self._connection_pool, context=self._ssl_context, debuglevel=debuglevel)
+        self._opener = urllib2.build_opener(no_proxy_support,
+                                            cookie_handler,
+                                            keep_alive_handler,
+                                            GzipProcessor())
+        self._opener.addheaders = [('User-agent', API_USER_AGENT)]
+
+    @property
+    def cookie_jar(self):
+        """ Get the cookie jar """
+        return self._cookie_jar
+
+    @property
+    def ssl_context(self):
+        """ Get the TLS context, or None for the default (verifying) context """
+        return self._ssl_context
+
+    @property
+    def connection_pool(self):
+        """ Get the connection pool """
+        return self._connection_pool
+
+    @property
+    def opener(self):
+        """ Get the urllib2 opener """
+        return self._opener
+
+    def open(self, url, data=None, timeout=None):
+        """ Open a URL or urllib2.Request through the session, the same as urllib2.urlopen().
+
+        Args:
+            url (str or object): The URL or urllib2.Request instance to open.
+            data (str): The request body.
+            timeout (float): Socket timeout in seconds.
+        Returns:
+            The response file-like object.
+        """
+        if timeout is None:
+            return self._opener.open(url, data)
+        return self._opener.open(url, data, timeout)
+
+    def close(self):
+        """ Close the idle pooled connections """
+        self._connection_pool.close()
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+
+import os
+import hmac
+import json
+import time
+import errno
+import struct
+import hashlib
+
+from logger import get_logger
+
+
+class TicketCache(object):
+    """ On-disk cache of CAS Ticket Granting Tickets (TGT).
+
+    Each (cas_host, group, user) has its own entry file. The entry is encrypted and authenticated with keys derived
+    from the user password (PBKDF2-HMAC-SHA256), so a TGT can only be read back by someone who knows the password, and a
+    tampered or foreign entry is simply ignored. Entries older than "max_age" seconds are treated as expired without
+    asking the CAS server.
+    """
+
+    __magic = 'ETC1'
+    __kdf_iterations = 10000
+    __salt_size = 16
+    __nonce_size = 16
+    __mac_size = 32
+
+    def __init__(self, path=None, max_age=4 * 3600):
+        """ Constructor
+
+        Args:
+            path (str): The cache directory. Default: ~/.etunexus/tickets
+            max_age (int): Seconds a cached TGT is trusted. It should not exceed the TGT lifetime of the CAS server.
+        """
+        self._path = path if path else os.path.join(os.path.expanduser('~'), '.etunexus', 'tickets')
+        assert max_age > 0
+        self._max_age = max_age
+        self._logger = get_logger()
+
+    @property
+    def path(self):
+        """ Get the cache directory """
+        return self._path
+
+    @property
+    def max_age(self):
+        """ Get max age (seconds) of a cached TGT """
+        return self._max_age
+
+    def _entry_path(self, cas_host, group, user):
+        key = u'\0'.join([unicode(x) for x in (cas_host, group, user)]).encode('utf-8')
+        return os.path.join(self._path, hashlib.sha256(key).hexdigest())
+
+    @classmethod
+    def _derive_keys(cls, password, salt):
+        if isinstance(password, unicode):
+            password = password.encode('utf-8')
+        key = hashlib.pbkdf2_hmac('sha256', password, salt, cls.__kdf_iterations, 64)
+        return key[:32], key[32:]
+
+    @staticmethod
+    def _keystream_xor(key, nonce, data):
+        # HMAC-SHA256 in counter mode as the keystream
+        out = []
+        for i in xrange(0, len(data), 32):
+            block = hmac.new(key, nonce + struct.pack('>Q', i // 32), hashlib.sha256).digest()
+            out.append(''.join([chr(ord(x) ^ ord(y)) for x, y in zip(data[i:i + 32], block)]))
+        return ''.join(out)
+
+    def _encrypt(self, password, plaintext):
+        salt = os.urandom(self.__salt_size)
+        nonce = os.urandom(self.__nonce_size)
+        enc_key, mac_key = self._derive_keys(password, salt)
+        body = self.__magic + salt + nonce + self._keystream_xor(enc_key, nonce, plaintext)
+        return body + hmac.new(mac_key, body, hashlib.sha256).digest()
+
+    def _decrypt(self, password, blob):
+        header_size = len(self.__magic) + self.__salt_size + self.__nonce_size
+        if len(blob) < header_size + self.__mac_size or not blob.startswith(self.__magic):
+            return None
+        body, mac = blob[:-self.__mac_size], blob[-self.__mac_size:]
+        salt = body[len(self.__magic):len(self.__magic) + self.__salt_size]
+        nonce = body[len(self.__magic) + self.__salt_size:header_size]
+        enc_key, mac_key = self._derive_keys(password, salt)
+        if not hmac.compare_digest(mac, hmac.new(mac_key, body, hashlib.sha256).digest()):
+            return None
+        return self._keystream_xor(enc_key, nonce, body[header_size:])
+
+    def load(self, cas_host, group, user, password):
+        """ Load a cached TGT.
+
+        Returns:
+            str: The cached tgt, or None if there is no valid (readable and not expired) entry.
+        """
+        try:
+            with open(self._entry_path(cas_host, group, user), 'rb') as f:
+                blob = f.read()
+        except IOError:
+            return None
+
+        plaintext = self._decrypt(password, blob)
+        if plaintext is None:
+            self._logger.debug('Ignore unreadable TGT cache entry of (%s,%s,%s)' % (cas_host, group, user))
+            return None
+        try:
+            entry = json.loads(plaintext)
+        except ValueError:
+            return None
+        if time.time() - entry.get('time', 0) > self._max_age:
+            self._logger.debug('TGT cache entry of (%s,%s,%s) expired' % (cas_host, group, user))
+            return None
+        return str(entry['tgt'])
+
+    def save(self, cas_host, group, user, password, tgt):
+        """ Save a TGT to the cache. """
+        try:
+            os.makedirs(self._path, 0700)
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+
+        entry_path = self._entry_path(cas_host, group, user)
+        tmp_path = '%s.%d.tmp' % (entry_path, os.getpid())
+        blob = self._encrypt(password, json.dumps({'tgt': tgt, 'time': time.time()}))
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0600)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(blob)
+        os.rename(tmp_path, entry_path)
+
+    def invalidate(self, cas_host, group, user):
+        """ Remove the cached TGT. """
+        try:
+            os.remove(self._entry_path(cas_host, group, user))
+        except OSError as e:
+            if e.errno != errno.ENOENT:
+                raise
@@ -22,7 +22,4 @@ setup(
     author_email=etunexus.__author_email__,
     license=etunexus.__license__,
     packages=find_packages(),
-    install_requires=[
-        'MultipartPostHandler'
-    ],
     zip_safe=False)
\ No newline at end of file